@@ -1,23 +1,49 @@
 """Main Dash App for Rainfall Analysis"""
 
+import functools
 from itertools import product
-from pathlib import Path
+import uuid
 from dash import dcc, html, Input, Output, State
-import pandas as pd
+import numpy as np
 import dash
 import dash_bootstrap_components as dbc
-import plotly.io as pio
+import diskcache
+import flask
 from pyconfig import appConfig
-from pytemplate import hktemplate
 import pyfigure, pyfunc, pylayout, pylayoutfunc  # pylint: disable=multiple-imports
-
-pio.templates.default = hktemplate
+import pycache, pycompact, pydownsample, pyexample, pymetrics, pyregression, pystore  # pylint: disable=multiple-imports
+import pytemplate  # pylint: disable=unused-import # registers the default template
 
 # DASH APP CONFIG
 APP_TITLE = appConfig.DASH_APP.APP_TITLE
 UPDATE_TITLE = appConfig.DASH_APP.UPDATE_TITLE
 DEBUG = appConfig.DASH_APP.DEBUG
 
+# GRAPH
+MAX_POINTS = appConfig.GRAPH.MAX_POINTS_PER_TRACE
+
+# ANALYSIS
+SUMMARY_PERIODS = ["16D", "MS", "YS"]
+# edits of more cells than this are analyzed again from scratch
+MAX_INCREMENTAL_CELLS = appConfig.ANALYSIS.MAX_INCREMENTAL_CELLS
+
+# ANALYSIS GRAPHS
+LABEL_PERIODS = ["Biweekly", "Monthly", "Yearly"]
+LABEL_MAXSUM = "Max + Sum"
+LABEL_RAINDRY = "Dry + Rain"
+LABEL_UFUNC = [LABEL_MAXSUM, LABEL_RAINDRY]
+LABEL_MAXDATE = "Maximum Rainfall Events"
+
+# BACKGROUND CALLBACKS
+# jobs run in a separate process, results are shared between workers on disk
+# and memoized by their inputs until the app is restarted
+LAUNCH_UID = uuid.uuid4().hex
+BACKGROUND_CALLBACK_MANAGER = dash.DiskcacheManager(
+    diskcache.Cache(appConfig.BACKGROUND_CALLBACK.CACHE_DIRECTORY),
+    cache_by=[lambda: LAUNCH_UID],
+    expire=appConfig.BACKGROUND_CALLBACK.EXPIRE_SECONDS,
+)
+
 # BOOTSRAP THEME
 THEME = appConfig.DASH_THEME.THEME
 DBC_CSS = (
@@ -34,8 +60,34 @@ app = dash.Dash(
         {"name": "viewport", "content": "width=device-width, initial-scale=1"},
     ],
     suppress_callback_exceptions=True,
+    background_callback_manager=BACKGROUND_CALLBACK_MANAGER,
 )
 server = app.server
+server.after_request(pymetrics.record_response)
+
+
+@server.route("/metrics")
+def metrics():
+    """Serve the callback metrics in the Prometheus text format."""
+    cache_stats = pycache.RESULTS.stats()
+    extra = {
+        "rainfall_result_cache_hits": (
+            "Result cache hits (all processes).",
+            cache_stats["hits"],
+        ),
+        "rainfall_result_cache_misses": (
+            "Result cache misses (all processes).",
+            cache_stats["misses"],
+        ),
+        "rainfall_result_cache_bytes": (
+            "Result cache size on disk (all processes).",
+            cache_stats["bytes"],
+        ),
+    }
+    return flask.Response(
+        pymetrics.render_prometheus(extra), mimetype="text/plain; version=0.0.4"
+    )
+
 
 app.layout = dbc.Container(
     [
@@ -43,6 +95,7 @@ app.layout = dbc.Container(
         pylayout.HTML_ALERT_README,
         pylayout.HTML_ROW_BUTTON_UPLOAD,
         pylayout.HTML_ROW_BUTTON_EXAMPLE,
+        pylayout.HTML_STORE,
         pylayout.HTML_ROW_TABLE,
         pylayout.HTML_ROW_BUTTON_VIZ,
         pylayout.HTML_ROW_OPTIONS_GRAPH_RAINFALL,
@@ -62,6 +115,61 @@ app.layout = dbc.Container(
 )
 
 
+def _current_table_edits(dataset_id, table_edits):
+    """Return the edited cells recorded for the current dataset."""
+
+    table_edits = table_edits or {}
+    if table_edits.get("dataset_id") == dataset_id:
+        return table_edits.get("edits")
+    return None
+
+
+def _load_table_dataframe(
+    dataset_id, table_edits, table_columns, filter_query, restore=True
+):
+    """Rebuild the table dataframe from the server-side dataset store.
+
+    With restore=False, an unchanged compact dataset is kept as a wet-day frame.
+    """
+
+    dataframe = pyfunc.transform_stored_dataframe(
+        pystore.DATASETS.get(dataset_id, restore=False),
+        table_columns,
+        table_edits=_current_table_edits(dataset_id, table_edits),
+        filter_query=filter_query,
+    )
+    return pycompact.restore_dataframe(dataframe) if restore else dataframe
+
+
+def _create_upload_table_layout(dataframe, filename=None, filedate=None):
+    """Create the layout of the uploaded (editable, server-side) table."""
+
+    return pylayoutfunc.create_table_layout(
+        dataframe,
+        "output-table",
+        filename=filename,
+        filedate=filedate,
+        editable=[False] + [True] * len(dataframe.columns),
+        renamable=True,
+        server_side=True,
+    )
+
+
+@functools.cache
+def _create_example_table_layout(button_id):
+    """Create the table layout of an example once, it is reused on every click."""
+
+    return _create_upload_table_layout(pyexample.load_example(button_id))
+
+
+# EXAMPLES
+# parsed at import, the first click on an example is served from memory
+if appConfig.EXAMPLES.PRELOAD:
+    pyexample.preload(precompute=appConfig.EXAMPLES.PRECOMPUTE)
+    for _button_id in pyexample.EXAMPLE_FILES:
+        _create_example_table_layout(_button_id)
+
+
 @app.callback(
     [
         Output("row-table-uploaded", "children"),
@@ -69,6 +177,7 @@ app.layout = dbc.Container(
         Output("button-upload", "disabled"),
         Output("button-visualize", "disabled"),
         Output("button-visualize", "outline"),
+        Output("store-dataset-id", "data"),
     ],
     Input("dcc-upload", "contents"),
     State("dcc-upload", "filename"),
@@ -79,44 +188,39 @@ app.layout = dbc.Container(
     Input("button-example-4", "n_clicks"),
     prevent_initial_call=True,
 )
+@pymetrics.instrument_callback
 def callback_upload(content, filename, filedate, _b1, _b2, _b3, _b4):
     """Callback for uploading data and displaying the table."""
 
     ctx = dash.callback_context
 
     if content is not None:
-        children, dataframe = pyfunc.parse_upload_data(content, filename, filedate)
+        with pymetrics.stage("upload.parse"):
+            children, dataframe = pyfunc.parse_upload_data(content, filename, filedate)
 
-    example_data = {
-        "button-example-1.n_clicks": r"./example_7Y5S.csv",
-        "button-example-2.n_clicks": r"./example_2Y4S_named.csv",
-        "button-example-3.n_clicks": r"./example_9Y1S_named.csv",
-        "button-example-4.n_clicks": r"./example_1Y7S_named.csv",
-    }
+    context_trigger_id = ctx.triggered[0]["prop_id"].split(".")[0]
+    is_example = context_trigger_id in pyexample.EXAMPLE_FILES
 
-    context_trigger_prop_id = ctx.triggered[0]["prop_id"]
-
-    if context_trigger_prop_id in example_data:
-        example_file = example_data[context_trigger_prop_id]
-        dataframe = pd.read_csv(Path(example_file), index_col=0, parse_dates=True)
-        filename = None
-        filedate = None
+    if is_example:
+        dataframe = pyexample.load_example(context_trigger_id)
 
     upload_disabled = False
     button_upload_disabled = False
     button_viz_disabled = True
     button_viz_outline = True
+    dataset_id = None
 
     if dataframe is not None:
-        editable = [False] + [True] * len(dataframe.columns)
-        children = pylayoutfunc.create_table_layout(
-            dataframe,
-            "output-table",
-            filename=filename,
-            filedate=filedate,
-            editable=editable,
-            renamable=True,
-        )
+        with pymetrics.stage("upload.store"):
+            if is_example:
+                dataset_id = pystore.DATASETS.put_shared(context_trigger_id)
+            else:
+                dataset_id = pystore.DATASETS.put(dataframe)
+        with pymetrics.stage("upload.layout"):
+            if is_example:
+                children = _create_example_table_layout(context_trigger_id)
+            else:
+                children = _create_upload_table_layout(dataframe, filename, filedate)
         upload_disabled = False
         button_upload_disabled = False
         button_viz_disabled = False
@@ -128,9 +232,110 @@ def callback_upload(content, filename, filedate, _b1, _b2, _b3, _b4):
         button_upload_disabled,
         button_viz_disabled,
         button_viz_outline,
+        dataset_id,
     ]
 
 
+app.clientside_callback(
+    """
+    function (_, data, dataPrevious, datasetId, tableEdits) {
+        if (!data || !dataPrevious) {
+            return window.dash_clientside.no_update;
+        }
+        const edits = Object.assign(
+            {},
+            tableEdits && tableEdits.dataset_id === datasetId ? tableEdits.edits : {}
+        );
+        data.forEach(function (row, index) {
+            const previous = dataPrevious[index] || {};
+            const rowId = row.id === undefined ? index : row.id;
+            Object.keys(row).forEach(function (columnId) {
+                if (columnId !== "id" && row[columnId] !== previous[columnId]) {
+                    edits[rowId] = Object.assign({}, edits[rowId]);
+                    edits[rowId][columnId] = row[columnId];
+                }
+            });
+        });
+        return {dataset_id: datasetId, edits: edits};
+    }
+    """,
+    Output("store-table-edits", "data"),
+    Input("output-table", "data_timestamp"),
+    State("output-table", "data"),
+    State("output-table", "data_previous"),
+    State("store-dataset-id", "data"),
+    State("store-table-edits", "data"),
+    prevent_initial_call=True,
+)
+
+
+@app.callback(
+    Output("output-table", "data"),
+    Output("output-table", "page_count"),
+    Input("output-table", "page_current"),
+    Input("output-table", "page_size"),
+    Input("output-table", "sort_by"),
+    Input("output-table", "filter_query"),
+    State("store-dataset-id", "data"),
+    State("store-table-edits", "data"),
+    prevent_initial_call=True,
+)
+@pymetrics.instrument_callback
+def callback_table_page(
+    page_current, page_size, sort_by, filter_query, dataset_id, table_edits
+):
+    """Callback for paging, filtering and sorting the table on the server."""
+
+    try:
+        dataframe = pyfunc.apply_table_edits(
+            pystore.DATASETS.get(dataset_id),
+            _current_table_edits(dataset_id, table_edits),
+        )
+    except pystore.DatasetNotFoundError as e:
+        raise dash.exceptions.PreventUpdate from e
+
+    positions = pyfunc.query_table_rows(dataframe, filter_query, sort_by)
+    page_count = max(1, -(-len(positions) // page_size))
+    page_current = min(page_current or 0, page_count - 1)
+    page = positions[page_current * page_size : (page_current + 1) * page_size]
+
+    records = pylayoutfunc.create_table_records(
+        dataframe.iloc[page], row_ids=page.tolist()
+    )
+    return records, page_count
+
+
+def _create_rainfall_figure(dataframe, graphbar_opt, source):
+    """Create the rainfall figure and the graph state kept in the browser.
+
+    The graph state tells which table (source hash) and option (graphbar) the
+    figure shows, whether it holds every row of the table (complete) and
+    whether it is refined on zoom (downsampled, only when it is not complete).
+    """
+
+    complete = len(dataframe) <= MAX_POINTS
+    graph_state = {
+        "source": source,
+        "columns": dataframe.columns.to_list(),
+        "size": int(dataframe.size),
+        "graphbar": None,
+        "downsampled": not complete,
+        "complete": complete,
+    }
+
+    if dataframe.size > (366 * 8):
+        fig = pyfigure.generate_scatter_figure(dataframe, max_points=MAX_POINTS)
+    else:
+        graph_state["graphbar"] = graphbar_opt
+        if graphbar_opt in ["group", "stack"]:
+            fig = pyfigure.generate_bar_figure(dataframe, graphbar_opt)
+            graph_state.update(downsampled=False, complete=True)
+        else:
+            fig = pyfigure.generate_scatter_figure(dataframe, max_points=MAX_POINTS)
+
+    return fig, graph_state
+
+
 @app.callback(
     [
         Output("graph-rainfall", "figure"),
@@ -139,32 +344,64 @@ def callback_upload(content, filename, filedate, _b1, _b2, _b3, _b4):
         Output("container-graphbar-options", "style"),
         Output("button-analyze", "disabled"),
         Output("button-analyze", "outline"),
+        Output("store-graph-rainfall", "data"),
     ],
     Input("button-visualize", "n_clicks"),
-    State("output-table", "derived_virtual_data"),
+    State("store-dataset-id", "data"),
+    State("store-table-edits", "data"),
+    State("output-table", "filter_query"),
     State("output-table", "columns"),
     State("radio-graphbar-options", "value"),
+    State("store-graph-rainfall", "data"),
     prevent_initial_call=True,
 )
-def callback_visualize(_, table_data, table_columns, graphbar_opt):
+@pymetrics.instrument_callback
+def callback_visualize(
+    _, dataset_id, table_edits, filter_query, table_columns, graphbar_opt, graph_state
+):
     """Callback for visualizing the rainfall data."""
 
-    dataframe = pyfunc.transform_to_dataframe(table_data, table_columns)
+    source = pycache.content_hash(
+        [
+            dataset_id,
+            _current_table_edits(dataset_id, table_edits),
+            filter_query,
+            table_columns,
+        ]
+    )
+    # the figure already shows this table (and option), nothing is sent again
+    if (
+        graph_state
+        and graph_state.get("source") == source
+        and graph_state.get("graphbar") in (None, graphbar_opt)
+    ):
+        raise dash.exceptions.PreventUpdate
+
+    try:
+        with pymetrics.stage("visualize.load"):
+            dataframe = _load_table_dataframe(
+                dataset_id, table_edits, table_columns, filter_query
+            )
+    except pystore.DatasetNotFoundError:
+        return [
+            pyfigure.generate_empty_figure("dataset expired, please upload again"),
+            {"visibility": "hidden"},
+            {"staticPlot": True},
+            {"visibility": "hidden"},
+            True,
+            True,
+            None,
+        ]
 
     row_download_table_style = {"visibility": "visible"}
     row_graph_config = {"staticPlot": False}
-    row_graphbar_options_style = {"visibility": "hidden"}
     button_analyze_disabled = False
     button_analyze_outline = False
 
-    if dataframe.size > (366 * 8):
-        fig = pyfigure.generate_scatter_figure(dataframe)
-    else:
-        row_graphbar_options_style = {"visibility": "visible"}
-        if graphbar_opt in ["group", "stack"]:
-            fig = pyfigure.generate_bar_figure(dataframe, graphbar_opt)
-        else:
-            fig = pyfigure.generate_scatter_figure(dataframe)
+    fig, graph_state = _create_rainfall_figure(dataframe, graphbar_opt, source)
+    row_graphbar_options_style = {
+        "visibility": "hidden" if graph_state["graphbar"] is None else "visible"
+    }
 
     return [
         fig,
@@ -173,69 +410,296 @@ def callback_visualize(_, table_data, table_columns, graphbar_opt):
         row_graphbar_options_style,
         button_analyze_disabled,
         button_analyze_outline,
+        graph_state,
     ]
 
 
+@app.callback(
+    Output("graph-rainfall", "figure", allow_duplicate=True),
+    Output("store-graph-rainfall", "data", allow_duplicate=True),
+    Input("radio-graphbar-options", "value"),
+    State("store-graph-rainfall", "data"),
+    State("store-dataset-id", "data"),
+    State("store-table-edits", "data"),
+    State("output-table", "filter_query"),
+    State("output-table", "columns"),
+    prevent_initial_call=True,
+)
+@pymetrics.instrument_callback
+def callback_graphbar_options(
+    graphbar_opt, graph_state, dataset_id, table_edits, filter_query, table_columns
+):
+    """Callback for switching the small dataset graph between stack, group and line."""
+
+    if not graph_state or graph_state.get("graphbar") in (None, graphbar_opt):
+        raise dash.exceptions.PreventUpdate
+
+    if graph_state["complete"]:
+        scatter_type = pyfigure.select_scatter_trace(graph_state["size"])().type
+        patched_figure = pyfigure.patch_graphbar_figure(
+            graph_state["graphbar"],
+            graphbar_opt,
+            len(graph_state["columns"]),
+            scatter_type=scatter_type,
+        )
+        return patched_figure, dict(graph_state, graphbar=graphbar_opt)
+
+    # the line figure is downsampled, the bars need every row again
+    try:
+        dataframe = _load_table_dataframe(
+            dataset_id, table_edits, table_columns, filter_query
+        )
+    except pystore.DatasetNotFoundError as e:
+        raise dash.exceptions.PreventUpdate from e
+
+    return _create_rainfall_figure(dataframe, graphbar_opt, graph_state["source"])
+
+
+@app.callback(
+    Output("graph-rainfall", "figure", allow_duplicate=True),
+    Input("graph-rainfall", "relayoutData"),
+    State("store-graph-rainfall", "data"),
+    State("store-dataset-id", "data"),
+    State("store-table-edits", "data"),
+    State("output-table", "filter_query"),
+    State("output-table", "columns"),
+    prevent_initial_call=True,
+)
+@pymetrics.instrument_callback
+def callback_refine_rainfall(
+    relayout, graph_state, dataset_id, table_edits, filter_query, table_columns
+):
+    """Callback for refining the downsampled rainfall graph to the zoomed window."""
+
+    if not graph_state or not graph_state["downsampled"] or not relayout:
+        raise dash.exceptions.PreventUpdate
+
+    if "xaxis.range[0]" in relayout:
+        x_range = [relayout["xaxis.range[0]"], relayout["xaxis.range[1]"]]
+    elif "xaxis.range" in relayout:
+        x_range = relayout["xaxis.range"]
+    elif relayout.get("xaxis.autorange"):
+        x_range = None
+    else:
+        raise dash.exceptions.PreventUpdate
+
+    try:
+        dataframe = _load_table_dataframe(
+            dataset_id, table_edits, table_columns, filter_query
+        )
+    except pystore.DatasetNotFoundError as e:
+        raise dash.exceptions.PreventUpdate from e
+
+    if dataframe.columns.to_list() != graph_state["columns"]:
+        raise dash.exceptions.PreventUpdate
+
+    downsampled = pydownsample.downsample_dataframe(
+        dataframe, MAX_POINTS, appConfig.GRAPH.DOWNSAMPLE_METHOD, x_range=x_range
+    )
+
+    patched_figure = dash.Patch()
+    for counter, series in enumerate(downsampled.values()):
+        patched_figure["data"][counter]["x"] = series.index
+        patched_figure["data"][counter]["y"] = series.to_numpy()
+
+    return patched_figure
+
+
 @app.callback(
     Output("download-csv", "data"),
     Input("button-download-csv", "n_clicks"),
-    State("output-table", "derived_virtual_data"),
+    Input("button-download-parquet", "n_clicks"),
+    State("store-dataset-id", "data"),
+    State("store-table-edits", "data"),
+    State("output-table", "filter_query"),
     State("output-table", "columns"),
     prevent_initial_call=True,
 )
-def callback_download_table(_, table_data, table_columns):
+@pymetrics.instrument_callback
+def callback_download_table(
+    _, _parquet, dataset_id, table_edits, filter_query, table_columns
+):
     """Callback for downloading the table data."""
-    dataframe = pyfunc.transform_to_dataframe(table_data, table_columns)
+    try:
+        dataframe = _load_table_dataframe(
+            dataset_id, table_edits, table_columns, filter_query
+        )
+    except pystore.DatasetNotFoundError as e:
+        raise dash.exceptions.PreventUpdate from e
+    if dash.callback_context.triggered_id == "button-download-parquet":
+        return dcc.send_data_frame(dataframe.to_parquet, "derived_table.parquet")
     return dcc.send_data_frame(dataframe.to_csv, "derived_table.csv")
 
 
+def _edited_cells_since(previous_source, source):
+    """Return the cells edited since the previous analysis of the same table.
+
+    None means the table changed otherwise, and it is analyzed again.
+    """
+
+    if not appConfig.ANALYSIS.INCREMENTAL or previous_source is None:
+        return None
+    if source["filter_query"] or any(
+        previous_source.get(key) != source[key]
+        for key in ("dataset_id", "table_columns", "filter_query")
+    ):
+        return None
+
+    cells = pyfunc.diff_table_edits(previous_source.get("edits"), source["edits"])
+    return cells if len(cells) <= MAX_INCREMENTAL_CELLS else None
+
+
+def _patch_analysis_tables(summary_all, cumsum, updated_rows):
+    """Patch the updated rows of the summary and cumulative sum tables."""
+
+    patched_tabs = dash.Patch()
+    for position, (summary, rows) in enumerate(zip(summary_all, updated_rows)):
+        _, _, records = pylayoutfunc.create_table_summary_records(summary.iloc[rows])
+        pylayoutfunc.patch_tabcard_table_rows(patched_tabs, position, rows, records)
+
+    rows = updated_rows[-1]
+    pylayoutfunc.patch_tabcard_table_rows(
+        patched_tabs,
+        len(summary_all),
+        rows,
+        pylayoutfunc.create_table_records(cumsum.iloc[rows]),
+    )
+    return patched_tabs
+
+
+def _analyze_edited_cells(dataframe, previous_analysis_id, cells, source):
+    """Update the previous analysis for the edited cells only, patching its tables."""
+
+    if not cells:
+        # nothing changed since the previous analysis
+        return [dash.no_update] * 5
+
+    summary_all, cumsum = pystore.ANALYSES.get(previous_analysis_id)
+    dataframe = pycompact.restore_dataframe(dataframe)
+
+    with pymetrics.stage("analyze.incremental"):
+        stored_index = pystore.DATASETS.get(source["dataset_id"], restore=False).index
+        cells = pyfunc.locate_edited_cells(stored_index, source["table_columns"], cells)
+        summary_all, cumsum, updated_rows = pyfunc.update_analysis(
+            dataframe, summary_all, cumsum, cells, SUMMARY_PERIODS
+        )
+
+    with pymetrics.stage("analyze.store"):
+        analysis_id = pystore.ANALYSES.put(summary_all, cumsum, source=source)
+
+    with pymetrics.stage("analyze.layout"):
+        children = _patch_analysis_tables(summary_all, cumsum, updated_rows)
+
+    return [children, False, False, {"visibility": "visible"}, analysis_id]
+
+
 @app.callback(
     [
         Output("tab-analysis", "children"),
         Output("button-viz-analysis", "disabled"),
         Output("button-viz-analysis", "outline"),
         Output("row-button-download-analysis-csv", "style"),
+        Output("store-analysis-id", "data"),
     ],
     Input("button-analyze", "n_clicks"),
-    State("output-table", "derived_virtual_data"),
+    State("store-dataset-id", "data"),
+    State("store-table-edits", "data"),
+    State("output-table", "filter_query"),
     State("output-table", "columns"),
+    State("store-analysis-id", "data"),
     prevent_initial_call=True,
+    background=True,
+    running=[
+        (Output("button-cancel-analyze", "disabled"), False, True),
+        (
+            Output("progress-analyze", "style"),
+            {"visibility": "visible"},
+            {"visibility": "hidden"},
+        ),
+    ],
+    cancel=[Input("button-cancel-analyze", "n_clicks")],
+    progress=[Output("progress-analyze", "value"), Output("progress-analyze", "max")],
 )
-def callback_analyze(_, table_data, table_columns):
+@pymetrics.instrument_callback
+def callback_analyze(
+    set_progress,
+    _,
+    dataset_id,
+    table_edits,
+    filter_query,
+    table_columns,
+    previous_analysis_id,
+):
     """Callback for analyzing the rainfall data."""
 
     button_viz_analysis_disabled = True
     button_viz_analysis_outline = True
     row_button_download_analysis_style = {"visibility": "hidden"}
+    analysis_id = None
 
     try:
-        dataframe = pyfunc.transform_to_dataframe(table_data, table_columns)
+        set_progress((0, 4))
+        with pymetrics.stage("analyze.load"):
+            # the summary and cumulative sum work on wet-day frames directly
+            dataframe = _load_table_dataframe(
+                dataset_id, table_edits, table_columns, filter_query, restore=False
+            )
+        set_progress((1, 4))
+
+        source = {
+            "dataset_id": dataset_id,
+            "table_columns": table_columns,
+            "filter_query": filter_query,
+            "edits": _current_table_edits(dataset_id, table_edits),
+        }
+        cells = _edited_cells_since(
+            pystore.ANALYSES.get_source(previous_analysis_id), source
+        )
+        if cells is not None:
+            try:
+                return _analyze_edited_cells(
+                    dataframe, previous_analysis_id, cells, source
+                )
+            except pystore.AnalysisNotFoundError:
+                pass
 
         # SUMMARY
-        summary_all = pyfunc.generate_summary_all(dataframe, n_days=["16D", "MS", "YS"])
-        tables_summary = [
-            pylayoutfunc.create_table_summary(
-                summary, f"table-analyze-{counter}", deletable=False
+        with pymetrics.stage("analyze.summary"):
+            summary_all = pycache.RESULTS.call(
+                pyfunc.generate_summary_all, dataframe, n_days=SUMMARY_PERIODS
             )
-            for counter, summary in enumerate(summary_all)
-        ]
+        set_progress((2, 4))
 
         # CUMUMLATIVE SUM
-        cumsum = pyfunc.calculate_cumulative_sum(dataframe)
-
-        _, table_cumsum = pylayoutfunc.create_table_layout(
-            cumsum, "table-cumsum", deletable=False
-        )
+        with pymetrics.stage("analyze.cumsum"):
+            cumsum = pycache.RESULTS.call(pyfunc.calculate_cumulative_sum, dataframe)
+        set_progress((3, 4))
 
-        table_cumsum = [table_cumsum]
+        # the typed results are read back by the download and graph callbacks
+        with pymetrics.stage("analyze.store"):
+            analysis_id = pystore.ANALYSES.put(summary_all, cumsum, source=source)
 
         # LAYOUT
-        tables_all = tables_summary + table_cumsum
-        tab_names = "Biweekly Monthly Yearly Cumulative".split()
+        with pymetrics.stage("analyze.layout"):
+            tables_summary = [
+                pylayoutfunc.create_table_summary(
+                    summary, f"table-analyze-{counter}", deletable=False
+                )
+                for counter, summary in enumerate(summary_all)
+            ]
+
+            _, table_cumsum = pylayoutfunc.create_table_layout(
+                cumsum, "table-cumsum", deletable=False
+            )
 
-        children = pylayoutfunc.create_tabcard_table_layout(
-            tables_all, tab_names=tab_names
-        )
+            table_cumsum = [table_cumsum]
+
+            tables_all = tables_summary + table_cumsum
+            tab_names = "Biweekly Monthly Yearly Cumulative".split()
+
+            children = pylayoutfunc.create_tabcard_table_layout(
+                tables_all, tab_names=tab_names
+            )
 
         button_viz_analysis_disabled = False
         button_viz_analysis_outline = False
@@ -244,6 +708,10 @@ def callback_analyze(_, table_data, table_columns):
         children = html.Div(
             f"Input data or columns are not in the expected format: {e}"
         )
+    except pystore.DatasetNotFoundError:
+        children = html.Div(
+            "Dataset is no longer available on the server, please upload it again."
+        )
     except KeyError as e:
         children = html.Div(f"Dataframe does not have the expected columns: {e}")
 
@@ -252,154 +720,76 @@ def callback_analyze(_, table_data, table_columns):
         button_viz_analysis_disabled,
         button_viz_analysis_outline,
         row_button_download_analysis_style,
+        analysis_id,
     ]
 
 
 @app.callback(
     Output("download-analysis-csv", "data"),
     Input("button-download-analysis-csv", "n_clicks"),
-    State("table-analyze-0", "data"),
-    State("table-analyze-0", "columns"),
-    State("table-analyze-1", "data"),
-    State("table-analyze-1", "columns"),
-    State("table-analyze-2", "data"),
-    State("table-analyze-2", "columns"),
-    State("table-cumsum", "data"),
-    State("table-cumsum", "columns"),
+    Input("button-download-analysis-parquet", "n_clicks"),
+    State("store-analysis-id", "data"),
     prevent_initial_call=True,
 )
-def callback_download_results(
-    _,
-    biweekly_data,
-    biweekly_columns,
-    monthly_data,
-    monthly_columns,
-    yearly_data,
-    yearly_columns,
-    cumsum_data,
-    cumsum_columns,
-):
+@pymetrics.instrument_callback
+def callback_download_results(_, _parquet, analysis_id):
     """Callback for downloading the analysis results."""
 
-    biweekly = (biweekly_data, biweekly_columns)
-    monthly = (monthly_data, monthly_columns)
-    yearly = (yearly_data, yearly_columns)
-
-    summary_all = []
-    for period in (biweekly, monthly, yearly):
-        data, columns = period
-        dataframe = pyfunc.transform_to_dataframe(
-            data,
-            columns,
-            multiindex=True,
-            apply_numeric=False,
-            parse_dates=["max_date"],
-        )
-        summary_all.append(dataframe)
-
-    cumsum = pyfunc.transform_to_dataframe(cumsum_data, cumsum_columns)
-    stations = cumsum.columns.to_list()
-    cumsum.columns = pd.MultiIndex.from_product([stations, [""]])
+    try:
+        summary_all, cumsum = pystore.ANALYSES.get(analysis_id)
+    except pystore.AnalysisNotFoundError as e:
+        raise dash.exceptions.PreventUpdate from e
 
-    dataframe_all = pd.concat(
-        summary_all + [cumsum],
-        axis=1,
-        keys=["Biweekly", "Monthly", "Yearly", "Cumulative"],
-    )
+    dataframe_all = pyfunc.combine_results(summary_all, cumsum)
 
+    if dash.callback_context.triggered_id == "button-download-analysis-parquet":
+        return dcc.send_data_frame(dataframe_all.to_parquet, "results.parquet")
     return dcc.send_data_frame(dataframe_all.to_csv, "results.csv")
 
 
+def _create_expired_graph():
+    """Create the graph shown when the analysis results have expired."""
+
+    return dcc.Graph(
+        figure=pyfigure.generate_empty_figure(
+            text="analysis expired, please analyze again"
+        ),
+        config={"staticPlot": True},
+    )
+
+
 @app.callback(
     Output("tab-graph-analysis", "children"),
     Output("tab-graph-cumsum", "children"),
     Output("tab-graph-consistency", "children"),
     Input("button-viz-analysis", "n_clicks"),
-    State("table-analyze-0", "data"),
-    State("table-analyze-0", "columns"),
-    State("table-analyze-1", "data"),
-    State("table-analyze-1", "columns"),
-    State("table-analyze-2", "data"),
-    State("table-analyze-2", "columns"),
-    State("table-cumsum", "data"),
-    State("table-cumsum", "columns"),
+    State("store-analysis-id", "data"),
     prevent_initial_call=True,
 )
-def callback_graph_analysis(
-    _,
-    biweekly_data,
-    biweekly_columns,
-    monthly_data,
-    monthly_columns,
-    yearly_data,
-    yearly_columns,
-    cumsum_data,
-    cumsum_columns,
-):
-    """Callback for generating the analysis graphs."""
-
-    label_periods = ["Biweekly", "Monthly", "Yearly"]
-    label_maxsum = ["Max + Sum"]
-    label_raindry = ["Dry + Rain"]
-    label_ufunc = label_maxsum + label_raindry
-
-    biweekly = (biweekly_data, biweekly_columns)
-    monthly = (monthly_data, monthly_columns)
-    yearly = (yearly_data, yearly_columns)
-
-    summary_all = []
-    for summary_period in (biweekly, monthly, yearly):
-        data, columns = summary_period
-        dataframe = pyfunc.transform_to_dataframe(
-            data,
-            columns,
-            multiindex=True,
-            apply_numeric=False,
-            parse_dates=["max_date"],
-        )
-        summary_all.append(dataframe)
+@pymetrics.instrument_callback
+def callback_graph_analysis(_, analysis_id):
+    """Callback for generating the tabs of the analysis graphs."""
 
-    graphs_maxsum = [
-        pyfigure.generate_summary_maximum_sum(
-            summary,
-            title=f"<b>{period}: {title}</b>",
-            period=period,
-            subplot_titles=["Max", "Sum"],
-        )
-        for summary, title, period in zip(summary_all, label_maxsum * 3, label_periods)
-    ]
-    graphs_raindry = [
-        pyfigure.generate_summary_rain_dry(
-            summary, title=f"<b>{period}: {title}</b>", period=period
-        )
-        for summary, title, period in zip(summary_all, label_raindry * 3, label_periods)
-    ]
-    graph_maxdate = [pyfigure.generate_summary_maximum_date(summary_all)]
+    try:
+        _, cumsum = pystore.ANALYSES.get(analysis_id)
+    except pystore.AnalysisNotFoundError:
+        expired = _create_expired_graph()
+        return expired, expired, expired
 
-    all_graphs = graphs_maxsum + graphs_raindry + graph_maxdate
-    labels = [": ".join(i) for i in product(label_ufunc, label_periods)]
-    labels += ["Maximum Rainfall Events"]
+    labels = [": ".join(i) for i in product(LABEL_UFUNC, LABEL_PERIODS)]
+    labels += [LABEL_MAXDATE]
 
-    children_analysis = pylayoutfunc.create_tabcard_graph_layout(
-        all_graphs, labels, active_tab="Maximum Rainfall Events"
+    children_analysis = pylayoutfunc.create_tabcard_lazy_graph_layout(
+        labels, "tabs-graph-analysis", active_tab=LABEL_MAXDATE
     )
 
-    # CUMSUM
-
-    cumsum = pyfunc.transform_to_dataframe(cumsum_data, cumsum_columns)
-
-    graph_cumsum = [
-        pyfigure.generate_cumulative_sum(cumsum, data_column=station)
-        for station in cumsum.columns
-    ]
+    stations = cumsum.columns.to_list()
 
-    children_cumsum = pylayoutfunc.create_tabcard_graph_layout(
-        graph_cumsum, cumsum.columns
+    children_cumsum = pylayoutfunc.create_tabcard_lazy_graph_layout(
+        stations, "tabs-graph-cumsum"
     )
 
-    # CONSISTENCY
-
-    if cumsum.columns.size == 1:
+    if len(stations) == 1:
         children_consistency = (
             dcc.Graph(
                 figure=pyfigure.generate_empty_figure(
@@ -409,17 +799,99 @@ def callback_graph_analysis(
             ),
         )
     else:
-        graph_consistency = [
-            pyfigure.generate_scatter_with_trendline(cumsum, data_column=station)
-            for station in cumsum.columns
-        ]
-
-        children_consistency = pylayoutfunc.create_tabcard_graph_layout(
-            graph_consistency, cumsum.columns
+        children_consistency = pylayoutfunc.create_tabcard_lazy_graph_layout(
+            stations, "tabs-graph-consistency"
         )
 
     return children_analysis, children_cumsum, children_consistency
 
 
+@app.callback(
+    Output("tabs-graph-analysis-content", "children"),
+    Input("tabs-graph-analysis", "active_tab"),
+    State("store-analysis-id", "data"),
+    background=True,
+    cancel=[Input("button-analyze", "n_clicks")],
+)
+@pymetrics.instrument_callback
+def callback_graph_analysis_tab(active_tab, analysis_id):
+    """Callback for generating the analysis graph of the active tab."""
+
+    try:
+        summary_all, _ = pystore.ANALYSES.get(analysis_id)
+    except pystore.AnalysisNotFoundError:
+        return _create_expired_graph()
+
+    if active_tab == LABEL_MAXDATE:
+        return pycache.RESULTS.call(pyfigure.generate_summary_maximum_date, summary_all)
+
+    ufunc, period = active_tab.split(": ")
+    summary = summary_all[LABEL_PERIODS.index(period)]
+
+    if ufunc == LABEL_MAXSUM:
+        return pycache.RESULTS.call(
+            pyfigure.generate_summary_maximum_sum,
+            summary,
+            title=f"<b>{period}: {ufunc}</b>",
+            period=period,
+            subplot_titles=["Max", "Sum"],
+        )
+    return pycache.RESULTS.call(
+        pyfigure.generate_summary_rain_dry,
+        summary,
+        title=f"<b>{period}: {ufunc}</b>",
+        period=period,
+    )
+
+
+@app.callback(
+    Output("tabs-graph-cumsum-content", "children"),
+    Input("tabs-graph-cumsum", "active_tab"),
+    State("store-analysis-id", "data"),
+)
+@pymetrics.instrument_callback
+def callback_graph_cumsum_tab(active_tab, analysis_id):
+    """Callback for generating the cumulative sum graph of the active tab."""
+
+    try:
+        _, cumsum = pystore.ANALYSES.get(analysis_id)
+    except pystore.AnalysisNotFoundError:
+        return _create_expired_graph()
+
+    fits = pyregression.fit_ols(np.arange(1, len(cumsum) + 1), cumsum[[active_tab]])
+
+    return pycache.RESULTS.call(
+        pyfigure.generate_cumulative_sum,
+        cumsum,
+        data_column=active_tab,
+        fit=fits.loc[active_tab],
+    )
+
+
+@app.callback(
+    Output("tabs-graph-consistency-content", "children"),
+    Input("tabs-graph-consistency", "active_tab"),
+    State("store-analysis-id", "data"),
+)
+@pymetrics.instrument_callback
+def callback_graph_consistency_tab(active_tab, analysis_id):
+    """Callback for generating the consistency graph of the active tab."""
+
+    try:
+        _, cumsum = pystore.ANALYSES.get(analysis_id)
+    except pystore.AnalysisNotFoundError:
+        return _create_expired_graph()
+
+    references, fits = pycache.RESULTS.call(pyfunc.calculate_double_mass, cumsum)
+
+    return pycache.RESULTS.call(
+        pyfigure.generate_scatter_with_trendline,
+        cumsum,
+        data_column=active_tab,
+        reference=references[active_tab],
+        fit=fits.loc[active_tab],
+    )
+
+
 if __name__ == "__main__":
     app.run_server(debug=DEBUG)
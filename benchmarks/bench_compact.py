@@ -0,0 +1,62 @@
+"""
+Benchmark the memory and speed of wet-day frames against dense dataframes.
+
+Run from the repository root:
+    python -m benchmarks.bench_compact --years 30 --stations 200
+"""
+
+import argparse
+import time
+import pycompact
+import pyfunc
+from benchmarks.bench_summary import generate_dataset
+
+N_DAYS = ["16D", "MS", "YS"]
+
+
+def best_time(func, *args, repeat: int = 3, **kwargs) -> float:
+    """Return the best wall time (seconds) of a function call."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    """Print the memory and timings of a dense and a wet-day dataset."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--years", type=int, default=30)
+    parser.add_argument("--stations", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    dataframe = generate_dataset(args.years, args.stations)
+    frame = pycompact.compact_dataframe(dataframe)
+
+    dense_bytes = pycompact.memory_usage(dataframe)
+    wet_bytes = pycompact.memory_usage(frame)
+    print(f"dataset: {dataframe.shape[0]} days x {dataframe.shape[1]} stations")
+    print(
+        f"memory: dense {dense_bytes / 1e6:.1f} MB, wet-day {wet_bytes / 1e6:.1f} MB"
+        f" ({dense_bytes / wet_bytes:.1f}x smaller)"
+    )
+
+    timings = {
+        "compact": best_time(pycompact.compact_dataframe, dataframe),
+        "restore": best_time(pycompact.restore_dataframe, frame),
+    }
+    for name, data in (("dense", dataframe), ("wet-day", frame)):
+        timings[f"summary {name}"] = best_time(
+            pyfunc.generate_summary_all, data, n_days=N_DAYS, repeat=args.repeat
+        )
+        timings[f"cumsum {name}"] = best_time(
+            pyfunc.calculate_cumulative_sum, data, repeat=args.repeat
+        )
+    for name, seconds in timings.items():
+        print(f"{name:>16}: {seconds:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
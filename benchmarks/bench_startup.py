@@ -0,0 +1,93 @@
+"""
+Benchmark the cold start of the app (importing app.py in a fresh interpreter).
+
+Run from the repository root:
+    python -m benchmarks.bench_startup --repeat 5
+    python -m benchmarks.bench_startup --importtime 15
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+_TIME_IMPORT = (
+    "import time; start = time.perf_counter(); import {module}; "
+    "print(time.perf_counter() - start)"
+)
+
+
+def time_import(module: str = "app") -> float:
+    """
+    Time the import of a module in a fresh interpreter.
+
+    Args:
+        module (str, optional): The module name. Defaults to "app".
+
+    Returns:
+        float: The import time (seconds).
+    """
+    output = subprocess.run(
+        [sys.executable, "-c", _TIME_IMPORT.format(module=module)],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=dict(os.environ, PYTHONPATH=os.getcwd()),
+    )
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(module: str = "app", top: int = 15) -> list:
+    """
+    Return the slowest imports of a module from `python -X importtime`.
+
+    Args:
+        module (str, optional): The module name. Defaults to "app".
+        top (int, optional): The number of imports. Defaults to 15.
+
+    Returns:
+        list: Tuples of (self seconds, cumulative seconds, module name),
+            sorted by self time.
+    """
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=dict(os.environ, PYTHONPATH=os.getcwd()),
+    )
+    imports = []
+    for line in output.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        imports.append((int(self_us) / 1e6, int(cumulative_us) / 1e6, name.strip()))
+    return sorted(imports, reverse=True)[:top]
+
+
+def main():
+    """Print the cold start time of the app and its slowest imports."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--module", default="app")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--importtime", type=int, default=0, metavar="TOP")
+    args = parser.parse_args()
+
+    # the first run also builds the template cache file, it is reported apart
+    first = time_import(args.module)
+    times = [time_import(args.module) for _ in range(args.repeat)]
+    print(f"import {args.module}: first {first:.3f} s")
+    print(
+        f"import {args.module}: median {statistics.median(times):.3f} s,"
+        f" best {min(times):.3f} s ({args.repeat} runs)"
+    )
+
+    if args.importtime:
+        print(f"\n{'self (s)':>9} {'cumulative (s)':>15}  module")
+        for self_s, cumulative_s, name in slowest_imports(args.module, args.importtime):
+            print(f"{self_s:>9.3f} {cumulative_s:>15.3f}  {name}")
+
+
+if __name__ == "__main__":
+    main()
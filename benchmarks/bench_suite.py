@@ -0,0 +1,216 @@
+"""
+Benchmark the analysis and figure hot paths and store the results per commit.
+
+Run from the repository root:
+    python -m benchmarks.bench_suite --sizes 7x5 30x100 50x500
+    python -m benchmarks.bench_suite --sizes 7x5 --compare benchmarks/results/abc1234.json
+"""
+
+import argparse
+import base64
+import json
+import platform
+import subprocess
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+import pandas as pd
+import plotly.io as pio
+import pyfigure
+import pyfunc
+from benchmarks.bench_summary import generate_dataset
+
+RESULTS_DIRECTORY = Path(__file__).parent / "results"
+
+
+def _figure_of(graph):
+    return graph.figure if hasattr(graph, "figure") else graph
+
+
+def build_cases(dataframe):
+    """
+    Build the benchmark cases for one dataset.
+
+    Args:
+        dataframe (pandas.DataFrame): The synthetic daily rainfall dataset.
+
+    Returns:
+        list: Tuples of (name, function, is_figure), each function takes no argument.
+    """
+    encoded = base64.b64encode(dataframe.to_csv().encode("utf-8")).decode("ascii")
+    content = "data:text/csv;base64," + encoded
+    columns = [{"id": name, "name": name} for name in ["DATE", *dataframe.columns]]
+    summary_all = pyfunc.generate_summary_all(dataframe, n_days=["16D", "MS", "YS"])
+    cumsum = pyfunc.calculate_cumulative_sum(dataframe)
+    station = dataframe.columns[0]
+    table_edits = {
+        str(row): {station: str(dataframe[station].iloc[row])}
+        for row in range(0, len(dataframe), 10)
+    }
+
+    return [
+        (
+            "ingest_csv",
+            lambda: pyfunc.read_base64_csv(content, content.find(",") + 1),
+            False,
+        ),
+        (
+            "transform_stored_dataframe",
+            lambda: pyfunc.transform_stored_dataframe(
+                dataframe, columns, table_edits=table_edits
+            ),
+            False,
+        ),
+        (
+            "summary_single_MS",
+            lambda: pyfunc.generate_summary_single(dataframe, "MS"),
+            False,
+        ),
+        (
+            "summary_all",
+            lambda: pyfunc.generate_summary_all(dataframe, ["16D", "MS", "YS"]),
+            False,
+        ),
+        ("cumulative_sum", lambda: pyfunc.calculate_cumulative_sum(dataframe), False),
+        ("double_mass", lambda: pyfunc.calculate_double_mass(cumsum), False),
+        (
+            "fig_scatter",
+            lambda: pyfigure.generate_scatter_figure(dataframe, max_points=2000),
+            True,
+        ),
+        ("fig_bar", lambda: pyfigure.generate_bar_figure(dataframe), True),
+        (
+            "fig_maximum_sum_monthly",
+            lambda: pyfigure.generate_summary_maximum_sum(
+                summary_all[1], period="Monthly"
+            ),
+            True,
+        ),
+        (
+            "fig_rain_dry_monthly",
+            lambda: pyfigure.generate_summary_rain_dry(
+                summary_all[1], period="Monthly"
+            ),
+            True,
+        ),
+        (
+            "fig_maximum_date",
+            lambda: pyfigure.generate_summary_maximum_date(summary_all),
+            True,
+        ),
+        (
+            "fig_cumulative_sum",
+            lambda: pyfigure.generate_cumulative_sum(cumsum, data_column=station),
+            True,
+        ),
+        (
+            "fig_consistency",
+            lambda: pyfigure.generate_scatter_with_trendline(
+                cumsum, data_column=station
+            ),
+            True,
+        ),
+    ]
+
+
+def run_case(func, is_figure: bool, repeat: int) -> dict:
+    """
+    Time a case and measure the JSON payload of figures.
+
+    Args:
+        func (callable): The case function.
+        is_figure (bool): Whether the function returns a figure or a dcc.Graph.
+        repeat (int): The number of runs, the best time is kept.
+
+    Returns:
+        dict: The best and mean seconds, and the payload bytes of figures.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+
+    record = {"best_s": min(times), "mean_s": sum(times) / len(times)}
+    if is_figure:
+        record["payload_bytes"] = len(pio.to_json(_figure_of(result)))
+    return record
+
+
+def git_commit() -> str:
+    """Return the short hash of the current commit, or "unknown"."""
+    try:
+        output = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return output.stdout.strip()
+
+
+def compare(results: dict, baseline: dict):
+    """Print the ratio of each timing and payload to a baseline run."""
+    print(f"\ncompared with {baseline['commit']} ({baseline['timestamp']})")
+    print(f"{'size':>8} {'case':>26} {'time':>8} {'payload':>8}")
+    for size, cases in results["sizes"].items():
+        for name, record in cases.items():
+            base = baseline["sizes"].get(size, {}).get(name)
+            if base is None:
+                continue
+            ratio = record["best_s"] / base["best_s"]
+            payload = ""
+            if "payload_bytes" in record and base.get("payload_bytes"):
+                payload = f"{record['payload_bytes'] / base['payload_bytes']:.2f}x"
+            print(f"{size:>8} {name:>26} {ratio:>7.2f}x {payload:>8}")
+
+
+def main():
+    """Run the benchmark suite, print and store the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", nargs="+", default=["7x5", "30x100", "50x500"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--cases", nargs="+", default=None)
+    parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument("--compare", type=Path, default=None)
+    args = parser.parse_args()
+
+    commit = git_commit()
+    results = {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "sizes": {},
+    }
+
+    print(f"{'size':>8} {'case':>26} {'best (s)':>10} {'payload (KB)':>13}")
+    for size in args.sizes:
+        years, stations = (int(value) for value in size.split("x"))
+        dataframe = generate_dataset(years, stations)
+        results["sizes"][size] = {}
+        for name, func, is_figure in build_cases(dataframe):
+            if args.cases is not None and name not in args.cases:
+                continue
+            record = run_case(func, is_figure, args.repeat)
+            results["sizes"][size][name] = record
+            payload = record.get("payload_bytes")
+            payload = f"{payload / 1024:>13.1f}" if payload is not None else f"{'':>13}"
+            print(f"{size:>8} {name:>26} {record['best_s']:>10.3f} {payload}")
+
+    output = (
+        RESULTS_DIRECTORY / f"{commit}.json" if args.output is None else args.output
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(f"\nresults stored in {output}")
+
+    if args.compare is not None:
+        compare(results, json.loads(args.compare.read_text()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark the vectorized summary engine against the hidrokit per-group path.
+
+Run from the repository root:
+    python -m benchmarks.bench_summary --years 30 --stations 200
+"""
+
+import argparse
+import time
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+import pyfunc
+
+
+def generate_dataset(years: int = 30, stations: int = 200, seed: int = 0):
+    """
+    Generate a synthetic daily rainfall dataset.
+
+    Args:
+        years (int, optional): The number of years. Defaults to 30.
+        stations (int, optional): The number of stations. Defaults to 200.
+        seed (int, optional): The random seed. Defaults to 0.
+
+    Returns:
+        pandas.DataFrame: The daily rainfall dataset with a few missing values.
+    """
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("1990-01-01", periods=int(365.25 * years), freq="D")
+    rainfall = rng.gamma(0.6, 12.0, size=(index.size, stations))
+    rainfall[rng.random(rainfall.shape) < 0.55] = 0
+    rainfall[rng.random(rainfall.shape) < 0.01] = np.nan
+    columns = [f"STA{number:03d}" for number in range(1, stations + 1)]
+    return pd.DataFrame(rainfall.round(1), index=index, columns=columns).rename_axis(
+        "DATE"
+    )
+
+
+def time_engine(dataframe, n_days, engine, repeat=1):
+    """Return the best wall time (seconds) and the result of one engine."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        summary = pyfunc.generate_summary_single(
+            dataframe, n_days=n_days, engine=engine
+        )
+        best = min(best, time.perf_counter() - start)
+    return best, summary
+
+
+def main():
+    """Run the benchmark and print a comparison table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--years", type=int, default=30)
+    parser.add_argument("--stations", type=int, default=200)
+    parser.add_argument("--periods", nargs="+", default=["16D", "MS", "YS"])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    dataframe = generate_dataset(args.years, args.stations)
+    print(f"dataset: {dataframe.shape[0]} days x {dataframe.shape[1]} stations")
+    print(f"{'period':>8} {'hidrokit (s)':>14} {'numpy (s)':>12} {'speedup':>9}")
+
+    for n_days in args.periods:
+        time_hidrokit, summary_hidrokit = time_engine(dataframe, n_days, "hidrokit")
+        time_numpy, summary_numpy = time_engine(
+            dataframe, n_days, "numpy", repeat=args.repeat
+        )
+        pdt.assert_frame_equal(summary_hidrokit, summary_numpy, check_freq=False)
+        print(
+            f"{n_days:>8} {time_hidrokit:>14.3f} {time_numpy:>12.3f}"
+            f" {time_hidrokit / time_numpy:>8.1f}x"
+        )
+
+    print(f"{'periods':>8} {'per period (s)':>14} {'single pass (s)':>16}")
+    times = {}
+    for single_pass in (False, True):
+        start = time.perf_counter()
+        pyfunc.generate_summary_all(
+            dataframe, n_days=args.periods, single_pass=single_pass
+        )
+        times[single_pass] = time.perf_counter() - start
+    print(f"{len(args.periods):>8} {times[False]:>14.3f} {times[True]:>16.3f}")
+
+
+if __name__ == "__main__":
+    main()
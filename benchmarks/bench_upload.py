@@ -0,0 +1,67 @@
+"""
+Benchmark the streaming CSV upload against decoding the whole upload at once.
+
+Run from the repository root:
+    python -m benchmarks.bench_upload --years 30 --stations 200
+"""
+
+import argparse
+import base64
+import io
+import time
+import tracemalloc
+import pandas as pd
+import pandas.testing as pdt
+import pyfunc
+from benchmarks.bench_summary import generate_dataset
+
+
+def read_at_once(content):
+    """Parse an upload the way parse_upload_data did before streaming."""
+    _, content_string = content.split(",")
+    decoded = base64.b64decode(content_string)
+    return pd.read_csv(
+        io.StringIO(decoded.decode("utf-8")), index_col=0, parse_dates=True
+    )
+
+
+def read_streaming(content):
+    """Parse an upload with the streaming reader."""
+    return pyfunc.read_base64_csv(content, content.find(",") + 1)
+
+
+def measure(func, content):
+    """Return the wall time (seconds), peak traced memory (bytes) and result."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(content)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def main():
+    """Run the benchmark and print a comparison table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--years", type=int, default=30)
+    parser.add_argument("--stations", type=int, default=200)
+    args = parser.parse_args()
+
+    dataframe = generate_dataset(args.years, args.stations)
+    encoded = base64.b64encode(dataframe.to_csv().encode("utf-8")).decode("ascii")
+    content = "data:text/csv;base64," + encoded
+    print(f"upload: {len(content) / 1024**2:.1f} MB (base64)")
+    print(f"{'path':>10} {'time (s)':>10} {'peak (MB)':>10}")
+
+    results = {}
+    for name, func in (("at once", read_at_once), ("streaming", read_streaming)):
+        elapsed, peak, results[name] = measure(func, content)
+        print(f"{name:>10} {elapsed:>10.3f} {peak / 1024**2:>10.1f}")
+
+    pdt.assert_frame_equal(results["at once"], results["streaming"])
+    print("bound:", pyfunc.bound_upload_buffers(content, results["streaming"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+This module contains a headless batch pipeline that analyzes many station
+    files (CSV, Parquet or Feather) in parallel without the Dash app,
+    writing one results file per input in the layout of the app download.
+
+Run from the repository root:
+    python pybatch.py "dumps/*.csv" --output results --workers 8
+"""
+
+import argparse
+import glob
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import pandas as pd
+import pyfunc
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_SUFFIXES = (".csv", ".parquet", ".feather")
+SUMMARY_PERIODS = ["16D", "MS", "YS"]
+
+
+def expand_inputs(inputs: list) -> list:
+    """
+    Expand directories and glob patterns into a sorted list of station files.
+
+    Args:
+        inputs (list): File paths, directories or glob patterns.
+
+    Returns:
+        list: The unique paths (pathlib.Path) of supported files, in input order.
+    """
+    paths = []
+    for item in inputs:
+        if Path(item).is_dir():
+            candidates = sorted(Path(item).iterdir())
+        else:
+            candidates = [Path(match) for match in sorted(glob.glob(item))]
+        paths.extend(
+            path
+            for path in candidates
+            if path.is_file() and path.suffix.lower() in SUPPORTED_SUFFIXES
+        )
+    return list(dict.fromkeys(paths))
+
+
+def read_station_file(path: Path) -> pd.DataFrame:
+    """
+    Read a station file with the date in the first column.
+
+    Args:
+        path (pathlib.Path): The CSV, Parquet or Feather file.
+
+    Returns:
+        pandas.DataFrame: The daily rainfall data with a datetime index.
+    """
+    suffix = path.suffix.lower()
+    if suffix == ".csv":
+        return pd.read_csv(path, index_col=0, parse_dates=True)
+
+    dataframe = pd.read_feather(path) if suffix == ".feather" else pd.read_parquet(path)
+    if not isinstance(dataframe.index, pd.DatetimeIndex):
+        dataframe = dataframe.set_index(dataframe.columns[0])
+        dataframe.index = pd.to_datetime(dataframe.index)
+    return dataframe
+
+
+def analyze_file(path: Path, output_directory: Path, file_format: str = "csv"):
+    """
+    Analyze one station file and write its results.
+
+    Args:
+        path (pathlib.Path): The station file.
+        output_directory (pathlib.Path): The directory of the results files.
+        file_format (str, optional): "csv" or "parquet". Defaults to "csv".
+
+    Returns:
+        tuple: The results path and the number of rows read.
+
+    Raises:
+        ValueError: If the first column is not dates or there is no station column.
+    """
+    dataframe = read_station_file(path)
+    if not isinstance(dataframe.index, pd.DatetimeIndex):
+        raise ValueError("the first column can not be parsed as dates")
+    if dataframe.columns.empty:
+        raise ValueError("the file has no station columns")
+
+    summary_all = pyfunc.generate_summary_all(dataframe, n_days=SUMMARY_PERIODS)
+    cumsum = pyfunc.calculate_cumulative_sum(dataframe)
+    results = pyfunc.combine_results(summary_all, cumsum)
+
+    output_path = output_directory / f"{path.stem}_results.{file_format}"
+    if file_format == "parquet":
+        results.to_parquet(output_path)
+    else:
+        results.to_csv(output_path)
+
+    return output_path, len(dataframe)
+
+
+def run_batch(
+    inputs: list,
+    output_directory: str,
+    file_format: str = "csv",
+    max_workers: int = None,
+) -> dict:
+    """
+    Analyze station files in parallel across a process pool.
+
+    Files that fail are logged and skipped, the others are still written.
+
+    Args:
+        inputs (list): File paths, directories or glob patterns.
+        output_directory (str): The directory of the results files.
+        file_format (str, optional): "csv" or "parquet". Defaults to "csv".
+        max_workers (int, optional): The number of processes.
+            Defaults to None (the number of CPUs).
+
+    Returns:
+        dict: The number of files, failed files, rows and elapsed seconds,
+            and the throughput in files/s and rows/s.
+    """
+    paths = expand_inputs(inputs)
+    output_directory = Path(output_directory)
+    output_directory.mkdir(parents=True, exist_ok=True)
+
+    n_rows, failed = 0, []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            path: executor.submit(analyze_file, path, output_directory, file_format)
+            for path in paths
+        }
+        for path, future in futures.items():
+            try:
+                output_path, rows = future.result()
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                # each file runs in a worker, one failure must not stop the batch
+                logger.error("%s: %s: %s", path, type(e).__name__, e)
+                failed.append(str(path))
+                continue
+            n_rows += rows
+            logger.info("%s -> %s (%d rows)", path, output_path, rows)
+    elapsed = time.perf_counter() - start
+
+    n_files = len(paths) - len(failed)
+    return {
+        "files": n_files,
+        "failed": failed,
+        "rows": n_rows,
+        "seconds": elapsed,
+        "files_per_second": n_files / elapsed if elapsed else 0.0,
+        "rows_per_second": n_rows / elapsed if elapsed else 0.0,
+    }
+
+
+def main():
+    """Run the batch pipeline from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1].strip())
+    parser.add_argument("inputs", nargs="+", help="files, directories or globs")
+    parser.add_argument("-o", "--output", default="results")
+    parser.add_argument("-f", "--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("-w", "--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+
+    stats = run_batch(args.inputs, args.output, args.format, args.workers)
+    print(
+        f"{stats['files']} files, {stats['rows']} rows in {stats['seconds']:.2f} s"
+        f" ({stats['files_per_second']:.2f} files/s,"
+        f" {stats['rows_per_second']:.0f} rows/s)"
+    )
+    if stats["failed"]:
+        print(f"{len(stats['failed'])} failed: {', '.join(stats['failed'])}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+This module contains a content-addressed cache for analysis results,
+    keyed by a hash of the input dataframes and arguments,
+    with bounded memory (LRU eviction) and hit/miss counters.
+
+The results are also kept in a diskcache directory, so results computed by
+    background callbacks (separate processes) and by other workers are shared.
+"""
+
+import dataclasses
+import hashlib
+import pickle
+import threading
+from collections import OrderedDict
+from pathlib import Path
+import diskcache
+import numpy as np
+import pandas as pd
+from pyconfig import appConfig
+
+
+def content_hash(value) -> str:
+    """
+    Compute a stable hash of a value based on its content.
+
+    DataFrames and Series are hashed from their values, index, columns and dtypes,
+        indexes and numeric arrays from their values,
+        lists, tuples, dicts and dataclasses (e.g. pycompact.WetDayFrame)
+        are hashed item by item, other values are hashed from their repr.
+
+    Args:
+        value: The value to hash.
+
+    Returns:
+        str: The hexadecimal digest.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    _update_hash(digest, value)
+    return digest.hexdigest()
+
+
+def _update_hash(digest, value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        digest.update(type(value).__name__.encode())
+        digest.update(pd.util.hash_pandas_object(value, index=True).to_numpy())
+        if isinstance(value, pd.DataFrame):
+            digest.update(repr(value.columns.to_list()).encode())
+            digest.update(repr(value.dtypes.to_list()).encode())
+        else:
+            digest.update(repr((value.name, value.dtype)).encode())
+    elif isinstance(value, pd.Index):
+        digest.update(f"{type(value).__name__}[{value.dtype}]".encode())
+        digest.update(pd.util.hash_pandas_object(value).to_numpy())
+        digest.update(repr(value.name).encode())
+    elif isinstance(value, np.ndarray) and value.dtype.kind in "biufcmM":
+        digest.update(repr(("ndarray", value.dtype.str, value.shape)).encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+    elif dataclasses.is_dataclass(value) and not isinstance(value, type):
+        digest.update(type(value).__qualname__.encode())
+        for field in dataclasses.fields(value):
+            _update_hash(digest, field.name)
+            _update_hash(digest, getattr(value, field.name))
+    elif isinstance(value, (list, tuple)):
+        digest.update(f"{type(value).__name__}[{len(value)}]".encode())
+        for item in value:
+            _update_hash(digest, item)
+    elif isinstance(value, dict):
+        digest.update(f"dict[{len(value)}]".encode())
+        for key in sorted(value, key=repr):
+            _update_hash(digest, key)
+            _update_hash(digest, value[key])
+    else:
+        digest.update(repr(value).encode())
+
+
+def _estimate_size(value) -> int:
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, (list, tuple)):
+        return sum(_estimate_size(item) for item in value)
+    return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def _copy_result(value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy()
+    if isinstance(value, list):
+        return [_copy_result(item) for item in value]
+    if isinstance(value, tuple):
+        return tuple(_copy_result(item) for item in value)
+    return value
+
+
+_MISSING = object()
+
+
+class ResultCache:
+    """
+    A thread-safe LRU cache of function results bounded by memory size.
+
+    Cached DataFrames and Series are copied when returned, other results
+        (e.g. figures) are shared and must not be modified by the caller.
+
+    When a directory is set, results are also stored on disk (diskcache, LRU
+        bounded by max_bytes), so they are shared between processes, and the
+        hit/miss counters count the calls of all processes.
+
+    Args:
+        max_bytes (int, optional): The maximum estimated size of all cached results.
+            Defaults to 256 MB.
+        directory (str, optional): The diskcache directory.
+            Defaults to None (this process only).
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024**2, directory: str = None):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._disk = None
+        self._counters = None
+
+        if directory:
+            self._disk = diskcache.Cache(
+                directory,
+                size_limit=max_bytes,
+                eviction_policy="least-recently-used",
+            )
+            self._counters = diskcache.Cache(str(Path(directory) / "counters"))
+
+    def __len__(self):
+        return len(self._items)
+
+    def call(self, func, *args, **kwargs):
+        """
+        Call a function, returning the cached result for the same inputs.
+
+        Args:
+            func (callable): The function to call.
+            *args: The positional arguments for the function.
+            **kwargs: The keyword arguments for the function.
+
+        Returns:
+            The result of func(*args, **kwargs).
+        """
+        key = content_hash(
+            (f"{func.__module__}.{func.__qualname__}", list(args), kwargs)
+        )
+
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                cached = self._items[key][0]
+            else:
+                cached = _MISSING
+
+        if cached is _MISSING and self._disk is not None:
+            cached = self._disk.get(key, default=_MISSING)
+            if cached is not _MISSING:
+                self._put_memory(key, cached)
+
+        if cached is not _MISSING:
+            self._count("hits")
+            return _copy_result(cached)
+        self._count("misses")
+
+        result = func(*args, **kwargs)
+        self._put(key, _copy_result(result))
+        return result
+
+    def stats(self) -> dict:
+        """
+        Return the cache counters.
+
+        With a directory, the counters, entries and bytes are those of the
+            disk store, shared by all processes.
+
+        Returns:
+            dict: The hits, misses, number of entries and estimated size in bytes.
+        """
+        if self._disk is not None:
+            return {
+                "hits": self._counters.get("hits", 0),
+                "misses": self._counters.get("misses", 0),
+                "entries": len(self._disk),
+                "bytes": self._disk.volume(),
+            }
+
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._items),
+                "bytes": self._size,
+            }
+
+    def clear(self):
+        """Remove all cached results and reset the counters."""
+        with self._lock:
+            self._items.clear()
+            self._size = 0
+            self.hits = 0
+            self.misses = 0
+        if self._disk is not None:
+            self._disk.clear()
+            self._counters.clear()
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+        if self._counters is not None:
+            self._counters.incr(counter)
+
+    def _put(self, key, value):
+        if self._put_memory(key, value) and self._disk is not None:
+            self._disk.set(key, value)
+
+    def _put_memory(self, key, value) -> bool:
+        size = _estimate_size(value)
+        if size > self.max_bytes:
+            return False
+
+        with self._lock:
+            if key in self._items:
+                self._size -= self._items.pop(key)[1]
+            self._items[key] = (value, size)
+            self._size += size
+            while self._size > self.max_bytes:
+                _, (_, evicted_size) = self._items.popitem(last=False)
+                self._size -= evicted_size
+        return True
+
+
+RESULTS = ResultCache(
+    max_bytes=appConfig.RESULT_CACHE.MAX_MEGABYTES * 1024**2,
+    directory=appConfig.RESULT_CACHE.DIRECTORY,
+)
@@ -0,0 +1,122 @@
+"""
+This module contains functions for downsampling long rainfall series
+    to a fixed number of points per trace, using min/max per bucket
+    or largest-triangle-three-buckets (LTTB), both keeping rainfall peaks.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def minmax_indices(values: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Select the minimum and maximum of each bucket, plus the first and last points.
+
+    Args:
+        values (numpy.ndarray): The values of the series (may contain NaN).
+        max_points (int): The maximum number of points to keep.
+
+    Returns:
+        numpy.ndarray: The sorted positions of the selected points.
+    """
+    size = len(values)
+    n_bucket = (max_points - 2) // 2
+    if size <= max_points or n_bucket < 1:
+        return np.arange(size)
+
+    bucket_size = -(-(size - 2) // n_bucket)
+    padded = np.full(n_bucket * bucket_size, np.nan)
+    padded[: size - 2] = values[1:-1]
+    padded = padded.reshape(n_bucket, bucket_size)
+
+    offset = 1 + np.arange(n_bucket)[:, np.newaxis] * bucket_size
+    is_nan = np.isnan(padded)
+    argmax = np.where(is_nan, -np.inf, padded).argmax(axis=1)[:, np.newaxis]
+    argmin = np.where(is_nan, np.inf, padded).argmin(axis=1)[:, np.newaxis]
+
+    selected = np.concatenate(
+        [[0], (offset + argmin).ravel(), (offset + argmax).ravel(), [size - 1]]
+    )
+    return np.unique(selected[selected < size])
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Select points with the largest-triangle-three-buckets algorithm.
+
+    Args:
+        x (numpy.ndarray): The x values (numeric, sorted).
+        y (numpy.ndarray): The y values (NaN are treated as 0 for the selection).
+        max_points (int): The maximum number of points to keep.
+
+    Returns:
+        numpy.ndarray: The sorted positions of the selected points.
+    """
+    size = len(y)
+    if size <= max_points or max_points < 3:
+        return np.arange(size)
+
+    x = np.asarray(x, dtype="float64")
+    y = np.nan_to_num(np.asarray(y, dtype="float64"))
+    edges = np.linspace(1, size - 1, max_points - 1).astype(int)
+    edges = np.append(edges, size)
+
+    selected = np.empty(max_points, dtype=int)
+    selected[0], selected[-1] = 0, size - 1
+    point = 0
+    for bucket in range(max_points - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_start, next_end = edges[bucket + 1], edges[bucket + 2]
+        mean_x = x[next_start:next_end].mean()
+        mean_y = y[next_start:next_end].mean()
+        area = np.abs(
+            (x[point] - mean_x) * (y[start:end] - y[point])
+            - (x[point] - x[start:end]) * (mean_y - y[point])
+        )
+        point = start + int(area.argmax())
+        selected[bucket + 1] = point
+
+    return selected
+
+
+def downsample_dataframe(
+    dataframe: pd.DataFrame,
+    max_points: int = None,
+    method: str = "minmax",
+    x_range: list = None,
+) -> dict:
+    """
+    Downsample each column of a dataframe to a maximum number of points.
+
+    Args:
+        dataframe (pandas.DataFrame): The daily rainfall data with a datetime index.
+        max_points (int, optional): The maximum number of points per column.
+            Defaults to None (no downsampling).
+        method (str, optional): "minmax" or "lttb". Defaults to "minmax".
+        x_range (list, optional): The [start, end] dates of the visible window,
+            only the rows inside the window are kept. Defaults to None.
+
+    Returns:
+        dict: A dictionary of column name to downsampled pandas.Series.
+    """
+
+    if x_range is not None:
+        start, end = pd.to_datetime(x_range[0]), pd.to_datetime(x_range[1])
+        dataframe = dataframe.loc[
+            (dataframe.index >= start.floor("D")) & (dataframe.index <= end.ceil("D"))
+        ]
+
+    if max_points is None or len(dataframe) <= max_points:
+        return dict(dataframe.items())
+
+    x_values = dataframe.index.asi8
+    downsampled = {}
+    for column, series in dataframe.items():
+        values = series.to_numpy(dtype="float64")
+        if method == "lttb":
+            selected = lttb_indices(x_values, values, max_points)
+        else:
+            selected = minmax_indices(values, max_points)
+        downsampled[column] = series.iloc[selected]
+
+    return downsampled
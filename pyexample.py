@@ -0,0 +1,80 @@
+"""
+This module contains the bundled example datasets, parsed once per process
+    and shared in the dataset store, instead of reading the CSV on every click.
+
+The app preloads them when it is imported, so every worker process has
+    them parsed before its first request.
+"""
+
+import threading
+from pathlib import Path
+import pandas as pd
+import pycache
+import pyfunc
+import pystore
+
+EXAMPLE_FILES = {
+    "button-example-1": r"./example_7Y5S.csv",
+    "button-example-2": r"./example_2Y4S_named.csv",
+    "button-example-3": r"./example_9Y1S_named.csv",
+    "button-example-4": r"./example_1Y7S_named.csv",
+}
+SUMMARY_PERIODS = ["16D", "MS", "YS"]
+
+_EXAMPLES = {}
+_LOCK = threading.Lock()
+
+
+def load_example(button_id: str) -> pd.DataFrame:
+    """
+    Return the dataframe of an example, parsing it on first use.
+
+    The dataframe is also shared in the dataset store under the button id,
+        see pystore.DatasetStore.put_shared.
+
+    Args:
+        button_id (str): The id of the example button (a key of EXAMPLE_FILES).
+
+    Returns:
+        pandas.DataFrame: The example dataframe (do not modify in place).
+    """
+    with _LOCK:
+        if button_id not in _EXAMPLES:
+            dataframe = pd.read_csv(
+                Path(EXAMPLE_FILES[button_id]), index_col=0, parse_dates=True
+            )
+            pystore.DATASETS.share(button_id, dataframe)
+            _EXAMPLES[button_id] = dataframe
+        return _EXAMPLES[button_id]
+
+
+def precompute_results(button_id: str):
+    """
+    Store the summaries and the cumulative sum of an example in the result cache.
+
+    The inputs match those of the analyze callback for an unedited table,
+        so analyzing an example is served from the cache.
+
+    Args:
+        button_id (str): The id of the example button (a key of EXAMPLE_FILES).
+    """
+    dataframe = load_example(button_id)
+    table_columns = [{"id": name, "name": name} for name in dataframe.columns]
+    dataframe = pyfunc.transform_stored_dataframe(dataframe, table_columns)
+
+    pycache.RESULTS.call(pyfunc.generate_summary_all, dataframe, n_days=SUMMARY_PERIODS)
+    pycache.RESULTS.call(pyfunc.calculate_cumulative_sum, dataframe)
+
+
+def preload(precompute: bool = False):
+    """
+    Parse all examples, and optionally precompute their results.
+
+    Args:
+        precompute (bool, optional): Whether to also precompute the results.
+            Defaults to False.
+    """
+    for button_id in EXAMPLE_FILES:
+        load_example(button_id)
+        if precompute:
+            precompute_results(button_id)
@@ -5,14 +5,16 @@ This module contains functions for generating different types of figures
 
 from collections import defaultdict, OrderedDict
 from itertools import cycle, islice
-import re
 import numpy as np
 import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
-from dash import dcc
+from dash import dcc, Patch
 from plotly.subplots import make_subplots
 from pyconfig import appConfig
+import pydownsample
+import pyparallel
+import pyregression
+import pysummary
 import pytemplate
 
 THRESHOLD_SUMMARY = (367 * 8) // 2
@@ -30,6 +32,28 @@ LABEL_GRAPH_RAINFALL = {
 current_font_color = pytemplate.FONT_COLOR_RGB_ALPHA
 
 
+def select_scatter_trace(
+    n_points: int,
+    render_mode: str = "auto",
+    webgl_threshold: int = appConfig.GRAPH.WEBGL_THRESHOLD,
+):
+    """Select the scatter trace type (SVG or WebGL) for a number of points.
+
+    Args:
+        n_points (int): The total number of points in the figure.
+        render_mode (str, optional): "auto", "svg" or "webgl".
+            Defaults to "auto".
+        webgl_threshold (int, optional): The number of points above which
+            "auto" switches to WebGL. Defaults to appConfig.GRAPH.WEBGL_THRESHOLD.
+
+    Returns:
+        type: go.Scattergl or go.Scatter.
+    """
+    if render_mode == "webgl" or (render_mode == "auto" and n_points > webgl_threshold):
+        return go.Scattergl
+    return go.Scatter
+
+
 def generate_watermark(
     subplot_number: int = 1, watermark_source=appConfig.TEMPLATE.WATERMARK_SOURCE
 ):
@@ -61,22 +85,39 @@ def generate_watermark(
     }
 
 
-def generate_scatter_figure(dataframe):
+def generate_scatter_figure(
+    dataframe, max_points: int = None, method: str = None, render_mode: str = "auto"
+):
     """
     Generate a scatter plot figure based on the provided dataframe.
 
     Parameters:
     dataframe (pandas.DataFrame): The dataframe containing the data to be plotted.
+    max_points (int, optional): The maximum number of points per station,
+        longer series are downsampled (see pydownsample). Defaults to None.
+    method (str, optional): The downsampling method, "minmax" or "lttb".
+        Defaults to appConfig.GRAPH.DOWNSAMPLE_METHOD.
+    render_mode (str, optional): "auto", "svg" or "webgl", see select_scatter_trace.
+        Defaults to "auto".
 
     Returns:
     plotly.graph_objs._figure.Figure: The scatter plot figure.
     """
 
+    method = appConfig.GRAPH.DOWNSAMPLE_METHOD if method is None else method
+    downsampled = pydownsample.downsample_dataframe(dataframe, max_points, method)
+
+    scatter = select_scatter_trace(
+        sum(series.size for series in downsampled.values()), render_mode
+    )
+
     data = [
-        go.Scatter(x=dataframe.index, y=dataframe[col], mode="lines", name=col)
-        for col in dataframe.columns
+        scatter(x=series.index, y=series, mode="lines", name=col)
+        for col, series in downsampled.items()
     ]
-    layout = go.Layout(hovermode="closest", **LABEL_GRAPH_RAINFALL)
+    layout = go.Layout(
+        hovermode="closest", uirevision="graph-rainfall", **LABEL_GRAPH_RAINFALL
+    )
 
     fig = go.Figure(data, layout)
 
@@ -99,12 +140,8 @@ def generate_bar_figure(dataframe, barmode="stack"):
 
     """
 
-    if barmode == "stack":
-        col_df = dataframe.columns[::-1]
-        bargap = 0
-    else:
-        col_df = dataframe.columns
-        bargap = 0.2
+    col_df = dataframe.columns[::-1] if barmode == "stack" else dataframe.columns
+    bargap = _bargap(barmode)
 
     data = [
         go.Bar(
@@ -123,6 +160,58 @@ def generate_bar_figure(dataframe, barmode="stack"):
     return fig
 
 
+def _bargap(barmode):
+    return 0 if barmode == "stack" else 0.2
+
+
+def patch_graphbar_figure(
+    graphbar_from: str, graphbar_to: str, n_traces: int, scatter_type: str = "scatter"
+):
+    """
+    Switch the rainfall figure between the "stack", "group" and "line" options.
+
+    Only the layout, the trace order and the trace types are patched,
+        the data arrays stay in the browser. The figure must hold every row,
+        as generate_bar_figure or a scatter figure that is not downsampled.
+
+    Args:
+        graphbar_from (str): The option of the current figure.
+        graphbar_to (str): The new option.
+        n_traces (int): The number of traces (stations).
+        scatter_type (str, optional): The trace type of the "line" option,
+            see select_scatter_trace. Defaults to "scatter".
+
+    Returns:
+        dash.Patch: The patch of the figure.
+    """
+    patched_figure = Patch()
+
+    # stacked bars are drawn in the reverse order of the columns
+    if (graphbar_from == "stack") != (graphbar_to == "stack"):
+        patched_figure["data"].reverse()
+
+    if graphbar_to == "line":
+        for counter in range(n_traces):
+            patched_figure["data"][counter]["type"] = scatter_type
+            patched_figure["data"][counter]["mode"] = "lines"
+        patched_figure["layout"]["hovermode"] = "closest"
+        patched_figure["layout"]["uirevision"] = "graph-rainfall"
+        del patched_figure["layout"]["barmode"]
+        del patched_figure["layout"]["bargap"]
+        return patched_figure
+
+    if graphbar_from == "line":
+        for counter in range(n_traces):
+            patched_figure["data"][counter]["type"] = "bar"
+            del patched_figure["data"][counter]["mode"]
+        patched_figure["layout"]["hovermode"] = "x unified"
+        del patched_figure["layout"]["uirevision"]
+
+    patched_figure["layout"]["barmode"] = graphbar_to
+    patched_figure["layout"]["bargap"] = _bargap(graphbar_to)
+    return patched_figure
+
+
 def generate_empty_figure(text: str = "", size: int = 40):
     """
     Generates an empty figure with optional text annotation.
@@ -169,6 +258,67 @@ def generate_empty_figure(text: str = "", size: int = 40):
     return go.Figure(data, layout)
 
 
+def generate_summary_heatmap(
+    summary: pd.DataFrame,
+    ufunc_cols: list[str],
+    title: str = "Summary Rainfall",
+    max_cells: int = appConfig.GRAPH.MAX_HEATMAP_CELLS,
+) -> dcc.Graph:
+    """
+    Generates a station x period heatmap for summaries too large for bar graphs.
+
+    Consecutive periods are merged (see pysummary.coarsen_summary) until
+        each heatmap holds at most max_cells cells.
+
+    Args:
+        summary (pd.DataFrame): The summary data containing rainfall information.
+        ufunc_cols (list[str]): The columns to display, one heatmap each.
+        title (str, optional): The title of the graph. Defaults to "Summary Rainfall".
+        max_cells (int, optional): The maximum number of cells per heatmap.
+            Defaults to appConfig.GRAPH.MAX_HEATMAP_CELLS.
+
+    Returns:
+        dcc.Graph: The generated graph.
+    """
+
+    stations = summary.columns.get_level_values(0).unique()
+    factor = -(-summary.index.size * stations.size // max_cells)
+    summary = pysummary.coarsen_summary(summary, factor)
+    if factor > 1:
+        title = f"{title} (every {factor} periods merged)"
+
+    rows = len(ufunc_cols)
+    fig = make_subplots(
+        rows=rows,
+        cols=1,
+        shared_xaxes=True,
+        vertical_spacing=0.1 / rows,
+        subplot_titles=ufunc_cols,
+    )
+
+    for n_row, ufcol in enumerate(ufunc_cols, 1):
+        values = summary.xs(ufcol, axis=1, level=1)
+        _heatmap = go.Heatmap(
+            x=values.index,
+            y=values.columns,
+            z=values.to_numpy().T,
+            name=ufcol,
+            colorbar={"len": 0.9 / rows, "y": 1 - (n_row - 0.5) / rows},
+            hovertemplate=f"%{{y}}<br>%{{x}}<br>{ufcol}: %{{z}}<extra></extra>",
+        )
+        fig.add_trace(_heatmap, row=n_row, col=1)
+
+    fig.update_layout(
+        title={"text": title, "pad": {"b": 20}},
+        height=max([600, 300 * rows]),
+        dragmode="zoom",
+    )
+    fig.update(layout={f"xaxis{rows}": {"title": "<b>Date</b>"}})
+    fig.update_yaxes(title="<b>Stations</b>")
+
+    return dcc.Graph(figure=fig)
+
+
 def generate_summary_maximum_sum(
     summary,
     ufunc_cols: list[str] = None,
@@ -204,10 +354,7 @@ def generate_summary_maximum_sum(
     if (
         (summary.size > THRESHOLD_SUMMARY) or (summary.index.size > THRESHOLD_XAXES)
     ) and (period.lower() != "yearly"):
-        return dcc.Graph(
-            figure=generate_empty_figure("dataset above threshold"),
-            config={"staticPlot": True},
-        )
+        return generate_summary_heatmap(summary, ufunc_cols, title=title)
 
     fig = make_subplots(
         rows=rows,
@@ -220,21 +367,11 @@ def generate_summary_maximum_sum(
     fig.layout.images = [generate_watermark(n) for n in range(2, rows + 1)]
 
     data_dict = defaultdict(list)
-    stations = [station_name for station_name, _ in summary.columns.to_list()]
-    stations = list(OrderedDict.fromkeys(stations))
-    last_series = None
-    for station in stations:
-        for ufcol, series in summary[station].items():
-            if ufcol in ufunc_cols:
-                _bar = go.Bar(
-                    x=np.arange(series.index.size),
-                    y=series,
-                    name=f"{station} ({ufcol})",
-                    legendgroup=station,
-                    legendgrouptitle_text=station,
-                )
-                data_dict[ufcol].append(_bar)
-            last_series = series
+    for traces in pyparallel.map_column_shards(
+        _generate_maximum_sum_traces, summary, ufunc_cols
+    ):
+        for ufcol, data in traces.items():
+            data_dict[ufcol].extend(data)
 
     for counter, (ufcol, data) in enumerate(data_dict.items(), 1):
         fig.add_traces(data, rows=counter, cols=cols)
@@ -250,20 +387,20 @@ def generate_summary_maximum_sum(
         legend={"title": "<b>Stations</b>"},
     )
 
-    ticktext = last_series.index.strftime("%d %b %Y")
+    ticktext = summary.index.strftime("%d %b %Y")
 
     if period.lower() in ["monthly", "yearly"]:
         if period.lower() == "monthly":
-            ticktext = last_series.index.strftime("%B %Y")
+            ticktext = summary.index.strftime("%B %Y")
         if period.lower() == "yearly":
-            ticktext = last_series.index.strftime("%Y")
+            ticktext = summary.index.strftime("%Y")
 
-    if last_series.index.size <= THRESHOLD_XAXES:
+    if summary.index.size <= THRESHOLD_XAXES:
         xticktext = ticktext
-        xtickvals = np.arange(last_series.index.size)
+        xtickvals = np.arange(summary.index.size)
     else:
         xticktext = ticktext[::2]
-        xtickvals = np.arange(last_series.index.size)[::2]
+        xtickvals = np.arange(summary.index.size)[::2]
 
     update_x_axes = {
         "ticktext": xticktext,
@@ -304,6 +441,24 @@ def generate_summary_maximum_sum(
     return dcc.Graph(figure=fig)
 
 
+def _generate_maximum_sum_traces(summary, ufunc_cols):
+    data_dict = defaultdict(list)
+    stations = [station_name for station_name, _ in summary.columns.to_list()]
+    stations = list(OrderedDict.fromkeys(stations))
+    for station in stations:
+        for ufcol, series in summary[station].items():
+            if ufcol in ufunc_cols:
+                _bar = go.Bar(
+                    x=np.arange(series.index.size),
+                    y=series,
+                    name=f"{station} ({ufcol})",
+                    legendgroup=station,
+                    legendgrouptitle_text=station,
+                )
+                data_dict[ufcol].append(_bar)
+    return dict(data_dict)
+
+
 def generate_summary_rain_dry(
     summary: pd.DataFrame,
     ufunc_cols: list[str] = None,
@@ -330,6 +485,7 @@ def generate_summary_rain_dry(
     Returns:
         dcc.Graph: The generated graph.
     """
+    summary = summary.copy()
     rows = summary.columns.levels[0].size if rows is None else rows
 
     ufunc_cols = ["n_rain", "n_dry"] if ufunc_cols is None else ufunc_cols
@@ -340,10 +496,7 @@ def generate_summary_rain_dry(
     if (
         (summary.size > THRESHOLD_SUMMARY) or (summary.index.size > THRESHOLD_XAXES)
     ) and (period.lower() != "yearly"):
-        return dcc.Graph(
-            figure=generate_empty_figure("dataset above threshold"),
-            config={"staticPlot": True},
-        )
+        return generate_summary_heatmap(summary, ufunc_cols, title=title)
 
     vertical_spacing = 0.2 / rows
 
@@ -471,10 +624,16 @@ def generate_summary_maximum_date(
     title: str = "Maximum Rainfall Events",
     periods: list[str] = None,
     bubble_sizes: list[int] = None,
+    render_mode: str = "auto",
+    max_points: int = appConfig.GRAPH.MAX_EVENT_POINTS,
 ):
     """
     Generates a summary graph of maximum rainfall events.
 
+    The events of each summary are melted into one (station, date, max) array.
+        When a summary has more than max_points station periods, consecutive
+        periods are merged (keeping the largest event) as in the heatmap.
+
     Args:
         summary_all (pd.DataFrame): The summary data containing rainfall information.
         ufunc_col (list[str], optional): The columns to use for calculations.
@@ -487,6 +646,10 @@ def generate_summary_maximum_date(
             Defaults to None.
         bubble_sizes (list[int], optional): The sizes of the bubbles in the graph.
             Defaults to None.
+        render_mode (str, optional): "auto", "svg" or "webgl",
+            see select_scatter_trace. Defaults to "auto".
+        max_points (int, optional): The maximum number of station periods
+            per subplot. Defaults to appConfig.GRAPH.MAX_EVENT_POINTS.
 
     Returns:
         dcc.Graph: The generated graph.
@@ -497,6 +660,17 @@ def generate_summary_maximum_date(
     )
     periods = ["biweekly", "monthly", "yearly"] if periods is None else periods
 
+    subplot_titles = list(subplot_titles)
+    stations = summary_all[0].columns.get_level_values(0).unique()
+    events = []
+    for n_row, summary in enumerate(summary_all):
+        factor = -(-summary.index.size * stations.size // max_points)
+        events.append(_melt_maximum_dates(summary, stations, ufunc_col, factor))
+        if factor > 1:
+            subplot_titles[n_row] = (
+                f"{subplot_titles[n_row]} (every {factor} periods merged)"
+            )
+
     fig = make_subplots(
         rows=rows,
         cols=cols,
@@ -507,51 +681,42 @@ def generate_summary_maximum_date(
 
     fig.layout.images = [generate_watermark(n) for n in range(2, rows + 1)]
 
-    # Create new DF
-
-    all_stat = []
-    for summary, period in zip(summary_all, periods):
-        stations = [station_name for station_name, _ in summary.columns.to_list()]
-        stations = list(OrderedDict.fromkeys(stations))
-        for station in stations:
-            _max = summary[station].dropna(subset=ufunc_col)
-            _max["max_date"] = pd.to_datetime(_max["max_date"])
-            _max = _max.set_index("max_date")[["max"]]
-            _max.columns = pd.MultiIndex.from_tuples([(period, station)])
-            all_stat.append(_max)
-
-    all_df = pd.concat(all_stat, axis=1)
-
     bubble_sizes = [10, 10, 10] if bubble_sizes is None else bubble_sizes
-
-    data_dict = defaultdict(list)
-    for period, bubble_size in zip(all_df.columns.levels[0], bubble_sizes):
-        sizeref = 2.0 * all_df[period].max().max() / (bubble_size**2)
-        for station, series in all_df[period].items():
-            yvals = series.where(~series.notna(), station)
-            _scatter = go.Scatter(
-                x=series.index,
-                y=yvals,
-                mode="markers",
-                marker_size=series.fillna(0),
-                marker_sizeref=sizeref,
-                marker_line_width=0,
-                legendgroup=station,
-                legendgrouptitle_text=station,
-                name=f"{period}",
-                hovertemplate="<i>%{y}</i><br>%{customdata[0]}<br>%{marker.size} mm<extra></extra>",
-                customdata=np.stack(
-                    [
-                        series.index.strftime("%d %B %Y"),
-                        series.to_numpy(),
-                    ],
-                    axis=-1,
-                ),
+    sizerefs = [
+        2.0 * summary.xs("max", axis=1, level=1).max().max() / (bubble_size**2)
+        for summary, bubble_size in zip(summary_all, bubble_sizes)
+    ]
+    n_points = sum(maxima.size for _, _, maxima in events)
+    scatter = select_scatter_trace(n_points, render_mode)
+
+    # traces as dicts are validated once, by add_traces
+    trace_type = scatter().type
+    colorway = pytemplate.hktemplate.layout.colorway
+    for n_row, (period, sizeref, (bounds, dates, maxima)) in enumerate(
+        zip(periods, sizerefs, events), 1
+    ):
+        traces = []
+        for position, station in enumerate(stations):
+            start, end = bounds[position], bounds[position + 1]
+            traces.append(
+                {
+                    "type": trace_type,
+                    "x": dates[start:end],
+                    "y": np.full(end - start, station, dtype=object),
+                    "mode": "markers",
+                    "marker": {
+                        "size": maxima[start:end],
+                        "sizeref": sizeref,
+                        "line": {"width": 0},
+                        "color": colorway[position % len(colorway)],
+                    },
+                    "legendgroup": station,
+                    "legendgrouptitle": {"text": station},
+                    "name": f"{period}",
+                    "hovertemplate": "<i>%{y}</i><br>%{x|%d %B %Y}<br>%{marker.size} mm<extra></extra>",
+                }
             )
-            data_dict[period].append(_scatter)
-
-    for counter, (period, data) in enumerate(data_dict.items(), 1):
-        fig.add_traces(data, rows=counter, cols=cols)
+        fig.add_traces(traces, rows=n_row, cols=cols)
 
     fig.update_layout(
         title_text=title,
@@ -592,23 +757,130 @@ def generate_summary_maximum_date(
         for axis, update in zip(["x", "y"], [update_x_axes, update_y_axes]):
             update_axis(fig, update, n_row, axis)
 
-    n_data = len(fig.data)
-    n_split = n_data // 3
+    return dcc.Graph(figure=fig)
 
-    if n_split < len(pytemplate.hktemplate.layout.colorway):
-        colors = list(pytemplate.hktemplate.layout.colorway[:n_split])
-    else:
-        colorway_list = pytemplate.hktemplate.layout.colorway
-        colors = list(islice(cycle(colorway_list), n_split))
 
-    for data, color in zip(fig.data, colors * 3):
-        data.marker.color = color
+def _melt_maximum_dates(summary, stations, ufunc_col, factor: int = 1):
+    """
+    Melt the maximum events of a summary into station-ordered arrays.
 
-    return dcc.Graph(figure=fig)
+    Every `factor` consecutive periods are merged into their largest event.
+
+    Returns the station bounds (the events of station i are
+        bounds[i]:bounds[i + 1]), the dates and the maxima of the events.
+    """
+    maxima = summary.xs("max", axis=1, level=1).reindex(columns=stations)
+    maxima = maxima.to_numpy(dtype=float)
+    dates = summary.xs("max_date", axis=1, level=1).reindex(columns=stations)
+    dates = pd.to_datetime(dates.to_numpy().ravel()).to_numpy().reshape(maxima.shape)
+    is_event = np.ones(maxima.shape, dtype=bool)
+    for column in ufunc_col:
+        values = summary.xs(column, axis=1, level=1).reindex(columns=stations)
+        is_event &= values.notna().to_numpy()
+
+    if factor > 1:
+        n_periods = maxima.shape[0]
+        n_groups = -(-n_periods // factor)
+        ranked = np.where(is_event, np.nan_to_num(maxima, nan=-np.inf), -np.inf)
+        padding = ((0, n_groups * factor - n_periods), (0, 0))
+        ranked = np.pad(ranked, padding, constant_values=-np.inf)
+        largest = ranked.reshape(n_groups, factor, -1).argmax(axis=1)
+        # a group without events picks its first (real) period, dropped below
+        rows = np.arange(n_groups)[:, None] * factor + largest
+        columns = np.arange(stations.size)
+        maxima, dates, is_event = (
+            array[rows, columns] for array in (maxima, dates, is_event)
+        )
+
+    # station by station, each in date order
+    station_codes = np.broadcast_to(np.arange(stations.size), maxima.shape)
+    is_event = is_event.T.ravel()
+    station_codes = station_codes.T.ravel()[is_event]
+    dates = dates.T.ravel()[is_event]
+    maxima = maxima.T.ravel()[is_event]
+    order = np.lexsort((dates, station_codes))
+    bounds = np.concatenate(
+        [[0], np.cumsum(np.bincount(station_codes, minlength=stations.size))]
+    )
+    return bounds, dates[order], maxima[order]
+
+
+def generate_trendline_figure(
+    x,
+    y: pd.Series,
+    fit: pd.Series = None,
+    hovertemplate: str = None,
+    x_unit: str = "",
+) -> go.Figure:
+    """
+    Generates a scatter plot of y against x with its OLS trendline.
+
+    Args:
+        x (array-like): The x values.
+        y (pd.Series): The y values, named after the station.
+        fit (pd.Series, optional): The slope, intercept and r2 of the trendline
+            (see pyregression.fit_ols). Defaults to None (fitted here).
+        hovertemplate (str, optional): The hover template of the scatter.
+            Defaults to None.
+        x_unit (str, optional): The unit shown after x in the trendline hover.
+            Defaults to "".
+
+    Returns:
+        go.Figure: The scatter plot with its trendline.
+    """
+
+    x = np.asarray(x)
+    y_values = y.to_numpy()
+    if fit is None:
+        fit = pyregression.fit_ols(x, y.to_frame()).iloc[0]
+
+    _scatter = go.Scatter(
+        x=x,
+        y=y_values,
+        mode="markers+lines",
+        name=y.name,
+        showlegend=False,
+        marker={
+            "color": pytemplate.hktemplate.layout.colorway[0],
+            "size": 12,
+            "symbol": "circle",
+        },
+        line={"dash": "dashdot", "width": 1},
+        hovertemplate=hovertemplate,
+    )
+
+    # TRENDLINE
+
+    valid = ~(pd.isna(x) | pd.isna(y_values))
+    trend_x = np.sort(x[valid], kind="stable")
+    if trend_x.size:
+        equation = pyregression.format_equation(fit.slope, fit.intercept)
+        trend_hovertemplate = (
+            "<b>OLS trendline</b><br>"
+            + f"<i>{equation}</i><br>"
+            + f"<i>R<sup>2</sup>: {fit.r2:f}</i><br>"
+            + "<b>%{y} mm</b> (trend)<br>"
+            + f"<i>%{{x}}{x_unit}</i>"
+            + "<extra></extra>"
+        )
+    else:
+        trend_hovertemplate = "<extra></extra>"
+
+    _trendline = go.Scatter(
+        x=trend_x,
+        y=fit.slope * trend_x + fit.intercept,
+        mode="lines",
+        name="trendline",
+        showlegend=True,
+        line={"color": pytemplate.hktemplate.layout.colorway[1]},
+        hovertemplate=trend_hovertemplate,
+    )
+
+    return go.Figure([_scatter, _trendline])
 
 
 def generate_cumulative_sum(
-    cumulative_sum_df: pd.DataFrame, data_column: str = None
+    cumulative_sum_df: pd.DataFrame, data_column: str = None, fit: pd.Series = None
 ) -> go.Figure:
     """
     Generates a cumulative sum plot using the provided DataFrame.
@@ -617,6 +889,8 @@ def generate_cumulative_sum(
         cumulative_sum_df (pd.DataFrame): The DataFrame containing the cumulative sum data.
         data_column (str, optional): The column name to use for the y-axis data.
             If not provided, the first column of the DataFrame will be used.
+        fit (pd.Series, optional): The precomputed trendline of the column
+            (see pyregression.fit_ols). Defaults to None (fitted here).
 
     Returns:
         go.Figure: The generated cumulative sum plot as a Plotly Figure.
@@ -625,56 +899,23 @@ def generate_cumulative_sum(
 
     data_column = cumulative_sum_df.columns[0] if data_column is None else data_column
 
-    new_dataframe = cumulative_sum_df.copy()
-    new_dataframe["number"] = np.arange(1, len(new_dataframe) + 1)
-
-    fig = px.scatter(
-        x=new_dataframe.number,
-        y=new_dataframe[data_column],
-        trendline="ols",
-        trendline_color_override=pytemplate.hktemplate.layout.colorway[1],
-    )
+    number = np.arange(1, len(cumulative_sum_df) + 1)
 
-    # MODIFIED SCATTER
-
-    _scatter = fig.data[0]
-    _scatter.mode = "markers+lines"
-    _scatter.line.dash = "dashdot"
-    _scatter.line.width = 1
-    _scatter.marker.size = 12
-    _scatter.marker.symbol = "circle"
-    _scatter.name = data_column
-    _scatter.hovertemplate = (
-        f"{data_column}<br><b>%{{y}} mm</b><br><i>%{{x}}</i><extra></extra>"
+    fig = generate_trendline_figure(
+        number,
+        cumulative_sum_df[data_column],
+        fit=fit,
+        hovertemplate=(
+            f"{data_column}<br><b>%{{y}} mm</b><br><i>%{{x}}</i><extra></extra>"
+        ),
     )
 
-    # MODIFIED TRENDLINE
-
-    _trendline = fig.data[1]
-    _oldhovertemplate = _trendline.hovertemplate
-
-    if _oldhovertemplate != "<extra></extra>":
-        re_pattern = re.compile("<br>(.+)<br>R.+=([0-9.]+)<br>")
-        equation, r2 = re_pattern.findall(_oldhovertemplate)[0]
-        _newtemplate = (
-            "<b>OLS trendline</b><br>"
-            + f"<i>{equation}</i><br>"
-            + f"<i>R<sup>2</sup>: {r2}</i><br>"
-            + "<b>%{y} mm</b> (trend)<br>"
-            + "<i>%{x}</i>"
-            + "<extra></extra>"
-        )
-        _trendline.hovertemplate = _newtemplate
-
-    _trendline.showlegend = True
-    _trendline.name = "trendline"
-
     fig.update_layout(
         xaxis_title="<b>Year</b>",
         yaxis_title="<b>Cumulative Annual (mm)</b>",
         margin=dict(l=0, t=35, b=0, r=0),
-        xaxis_tickvals=new_dataframe.number,
-        xaxis_ticktext=new_dataframe.index.year,
+        xaxis_tickvals=number,
+        xaxis_ticktext=cumulative_sum_df.index.year,
         yaxis_tickformat=".0f",
     )
 
@@ -682,7 +923,10 @@ def generate_cumulative_sum(
 
 
 def generate_scatter_with_trendline(
-    cumulative_sum_df: pd.DataFrame, data_column: str
+    cumulative_sum_df: pd.DataFrame,
+    data_column: str,
+    reference: pd.Series = None,
+    fit: pd.Series = None,
 ) -> go.Figure:
     """
     Generate a scatter plot with a trendline.
@@ -690,59 +934,34 @@ def generate_scatter_with_trendline(
     Args:
         cumulative_sum_df (pd.DataFrame): The cumulative sum dataframe.
         data_column (str): The column name for the data.
+        reference (pd.Series, optional): The mean cumulative sum of the other
+            stations (see pyfunc.calculate_double_mass). Defaults to None
+            (computed here).
+        fit (pd.Series, optional): The precomputed trendline of the station.
+            Defaults to None (fitted here).
 
     Returns:
         go.Figure: The scatter plot figure with a trendline.
     """
 
-    cumulative_sum_df = cumulative_sum_df.copy()
-
     # Create Mean Cumulative Other Stations
     cumsum_x = cumulative_sum_df[data_column]
-    other_stations = cumulative_sum_df.columns.drop(data_column)
-    cumsum_y = cumulative_sum_df[other_stations].mean(axis=1)
-
-    fig = px.scatter(
-        x=cumsum_x,
-        y=cumsum_y,
-        trendline="ols",
-        trendline_color_override=pytemplate.hktemplate.layout.colorway[1],
+    if reference is None:
+        other_stations = cumulative_sum_df.columns.drop(data_column)
+        reference = cumulative_sum_df[other_stations].mean(axis=1)
+    cumsum_y = reference.rename(data_column)
+
+    fig = generate_trendline_figure(
+        cumsum_x,
+        cumsum_y,
+        fit=fit,
+        hovertemplate=(
+            f"{data_column}<br><b>y: %{{y}} mm<br><i>x: %{{x}} mm</i></b>"
+            "<extra></extra>"
+        ),
+        x_unit=" mm",
     )
 
-    # MODIFIED SCATTER
-
-    _scatter = fig.data[0]
-    _scatter.mode = "markers+lines"
-    _scatter.line.dash = "dashdot"
-    _scatter.line.width = 1
-    _scatter.marker.size = 12
-    _scatter.marker.symbol = "circle"
-    _scatter.name = data_column
-    _scatter.hovertemplate = (
-        f"{data_column}<br><b>y: %{{y}} mm<br><i>x: %{{x}} mm</i></b><extra></extra>"
-    )
-
-    # MODIFIED TRENDLINE
-
-    _trendline = fig.data[1]
-    _oldhovertemplate = _trendline.hovertemplate
-
-    if _oldhovertemplate != "<extra></extra>":
-        re_pattern = re.compile("<br>(.+)<br>R.+=([0-9.]+)<br>")
-        equation, r2 = re_pattern.findall(_oldhovertemplate)[0]
-        _newtemplate = (
-            "<b>OLS trendline</b><br>"
-            + f"<i>{equation}</i><br>"
-            + f"<i>R<sup>2</sup>: {r2}</i><br>"
-            + "<b>%{y} mm</b> (trend)<br>"
-            + "<i>%{x} mm</i>"
-            + "<extra></extra>"
-        )
-        _trendline.hovertemplate = _newtemplate
-
-    _trendline.showlegend = True
-    _trendline.name = "trendline"
-
     fig.update_layout(
         xaxis_title=f"<b>Cumulative Annual {data_column} (mm)</b>",
         yaxis_title="<b>Cumulative Average Annual References (mm)</b>",
@@ -6,17 +6,161 @@ This module contains functions for parsing and processing uploaded data,
 """
 
 import base64
+import csv
 import io
+import logging
+import dataclasses
+import re
+import shutil
 import pandas as pd
+import pyarrow
 from dash import html
 import numpy as np
-from hidrokit.contrib.taruma import statistic_summary
+import pycompact
+import pyparallel
+import pyregression
+import pysummary
+
+logger = logging.getLogger(__name__)
+
+BASE64_CHUNK_SIZE = 4 * 256 * 1024
+
+
+class _Base64Stream(io.RawIOBase):
+    """A readable stream decoding a base64 string chunk by chunk."""
+
+    def __init__(self, content: str, start: int = 0):
+        super().__init__()
+        self._content = content
+        self._position = start
+        self._buffer = b""
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while len(self._buffer) < len(buffer) and self._position < len(self._content):
+            end = self._position + BASE64_CHUNK_SIZE
+            self._buffer += base64.b64decode(self._content[self._position : end])
+            self._position = end
+
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+
+def read_base64_csv(content: str, start: int = 0, float_dtype: str = "float64"):
+    """
+    Read a base64 encoded CSV file without decoding it all at once.
+
+    The first column is parsed as the date index, the other columns
+        (stations) are parsed as float_dtype. If a station column contains text,
+        the file is parsed again without the explicit dtypes.
+
+    Args:
+        content (str): The base64 encoded content.
+        start (int, optional): The position where the base64 data starts.
+            Defaults to 0.
+        float_dtype (str, optional): The dtype of the station columns.
+            Defaults to "float64".
+
+    Returns:
+        pandas.DataFrame: The parsed dataframe.
+    """
+
+    def open_stream():
+        return io.BufferedReader(
+            _Base64Stream(content, start), buffer_size=BASE64_CHUNK_SIZE
+        )
+
+    with open_stream() as stream:
+        header = stream.readline().decode("utf-8-sig")
+    names = next(csv.reader([header]), [])
+
+    try:
+        with open_stream() as stream:
+            return pd.read_csv(
+                stream,
+                index_col=0,
+                parse_dates=True,
+                encoding="utf-8",
+                dtype=dict.fromkeys(names[1:], float_dtype),
+            )
+    except ValueError as e:
+        if isinstance(e, UnicodeDecodeError):
+            raise
+        with open_stream() as stream:
+            return pd.read_csv(stream, index_col=0, parse_dates=True, encoding="utf-8")
+
+
+def read_base64_columnar(content: str, start: int = 0, filename: str = ".parquet"):
+    """
+    Read a base64 encoded Parquet or Feather file.
+
+    If the file has no date index (e.g. Feather files), the first column
+        is used as the date index.
+
+    Args:
+        content (str): The base64 encoded content.
+        start (int, optional): The position where the base64 data starts.
+            Defaults to 0.
+        filename (str, optional): The file name, ".feather" files are read
+            as Feather, otherwise as Parquet. Defaults to ".parquet".
+
+    Returns:
+        pandas.DataFrame: The parsed dataframe.
+    """
+
+    buffer = io.BytesIO()
+    with io.BufferedReader(_Base64Stream(content, start)) as stream:
+        shutil.copyfileobj(stream, buffer, BASE64_CHUNK_SIZE)
+    buffer.seek(0)
+
+    if filename.endswith(".feather"):
+        dataframe = pd.read_feather(buffer)
+    else:
+        dataframe = pd.read_parquet(buffer)
+
+    if not isinstance(dataframe.index, pd.DatetimeIndex):
+        if isinstance(dataframe.index, pd.RangeIndex):
+            dataframe = dataframe.set_index(dataframe.columns[0])
+        dataframe.index = pd.to_datetime(dataframe.index)
+
+    return dataframe
+
+
+def bound_upload_buffers(content: str, dataframe: pd.DataFrame = None) -> dict:
+    """
+    Give a rough upper bound of the buffers that streaming an upload avoids.
+
+    This is a formula, not a measurement (see benchmarks/bench_upload.py).
+        Decoding at once keeps the decoded bytes, the decoded text and its
+        StringIO buffer alive together, counted here as one byte per
+        decoded byte each. The base64 string is alive in both paths and
+        the parser's own buffers are not counted.
+
+    Args:
+        content (str): The uploaded content (data URL).
+        dataframe (pandas.DataFrame, optional): The parsed dataframe. Defaults to None.
+
+    Returns:
+        dict: The bound of the avoided bytes, and the dataframe bytes if given.
+    """
+    decoded = (len(content) - content.find(",") - 1) * 3 // 4
+    report = {"avoided_bytes_bound": 3 * decoded}
+    if dataframe is not None:
+        report["dataframe_bytes"] = int(dataframe.memory_usage(deep=True).sum())
+    return report
 
 
 def parse_upload_data(content, filename, filedate):
     """
     Parse and process uploaded data.
 
+    CSV files are decoded and parsed as a stream, see read_base64_csv.
+        Parquet and Feather files are read with read_base64_columnar.
+
     Args:
         content (str): The content of the uploaded file.
         filename (str): The name of the uploaded file.
@@ -24,7 +168,8 @@ def parse_upload_data(content, filename, filedate):
 
     Returns:
         tuple: A tuple containing the processed data and an HTML element.
-            The processed data is a pandas DataFrame if the file is in CSV format.
+            The processed data is a pandas DataFrame if the file is in CSV,
+                Parquet or Feather format.
             If the file is in XLSX or XLS format, an HTML element with a warning message
                 is returned.
             If the file is in any other format, an HTML element with an error message
@@ -32,14 +177,18 @@ def parse_upload_data(content, filename, filedate):
     """
 
     _ = filedate  # unused variable
-    _, content_string = content.split(",")
+    start = content.find(",") + 1
 
-    decoded = base64.b64decode(content_string)
     try:
         if filename.endswith(".csv"):
-            dataframe = pd.read_csv(
-                io.StringIO(decoded.decode("utf-8")), index_col=0, parse_dates=True
+            dataframe = read_base64_csv(content, start)
+            logger.info(
+                "upload %s parsed as a stream (rough bound): %s",
+                filename,
+                bound_upload_buffers(content, dataframe),
             )
+        elif filename.endswith(".parquet") or filename.endswith(".feather"):
+            dataframe = read_base64_columnar(content, start, filename)
         elif filename.endswith(".xlsx") or filename.endswith(".xls"):
             return (
                 html.Div(
@@ -54,25 +203,31 @@ def parse_upload_data(content, filename, filedate):
         else:
             return (
                 html.Div(
-                    ["Hanya dapat membaca format .csv (tiap kolom merupakan stasiun)"],
+                    [
+                        "Hanya dapat membaca format .csv, .parquet atau .feather",
+                        " (tiap kolom merupakan stasiun)",
+                    ],
                     className="text-center bg-danger text-white fs-4",
                 ),
                 None,
             )
     except UnicodeDecodeError as e:
-        print(e)
+        logger.warning("upload %s rejected: %s", filename, e)
         return html.Div([f"File is not valid UTF-8. {e}"]), None
     except pd.errors.ParserError as e:
-        print(e)
+        logger.warning("upload %s rejected: %s", filename, e)
         return html.Div([f"CSV file is not well-formed. {e}"]), None
+    except (pyarrow.ArrowException, OSError) as e:
+        logger.warning("upload %s rejected: %s", filename, e)
+        return html.Div([f"Parquet/Feather file is not well-formed. {e}"]), None
     except ValueError as e:
-        print(e)
+        logger.warning("upload %s rejected: %s", filename, e)
         return html.Div([f"Content string is not valid base64. {e}"]), None
 
     return html.Div(["File Diterima"]), dataframe
 
 
-def generate_summary_single(dataframe, n_days="1MS"):
+def generate_summary_single(dataframe, n_days="1MS", engine: str = "numpy"):
     """
     Generate a summary of rainfall data for a single location.
 
@@ -80,12 +235,22 @@ def generate_summary_single(dataframe, n_days="1MS"):
         dataframe (pandas.DataFrame): The input dataframe containing rainfall data.
         n_days (str, optional): The number of days to consider for the summary.
             Defaults to "1MS".
+        engine (str, optional): The summary engine, either "numpy" (vectorized
+            over all stations) or "hidrokit" (per-group Python functions).
+            Defaults to "numpy".
 
     Returns:
         pandas.DataFrame: The summary dataframe containing various statistics of
             the rainfall data.
     """
 
+    if engine == "numpy":
+        return pysummary.summarize(dataframe, n_days=n_days).infer_objects()
+
+    # hidrokit imports matplotlib, it is only loaded when this engine is used
+    # pylint: disable=import-outside-toplevel
+    from hidrokit.contrib.taruma import statistic_summary
+
     def days(vector):
         return len(vector)
 
@@ -116,15 +281,23 @@ def generate_summary_single(dataframe, n_days="1MS"):
     return summary.infer_objects()
 
 
-def generate_summary_all(dataframe, n_days: list = None):
+def generate_summary_all(
+    dataframe, n_days: list = None, engine: str = "numpy", single_pass: bool = True
+):
     """
     Generate summary statistics for multiple time periods.
 
     Args:
-        dataframe (pandas.DataFrame): The input dataframe containing the data.
+        dataframe (pandas.DataFrame or pycompact.WetDayFrame): The input dataframe
+            containing the data.
         n_days (list, optional): A list of time periods to calculate
             the summary statistics for.
             If not provided, the default time periods ["16D", "1MS", "1YS"] will be used.
+        engine (str, optional): The summary engine, "numpy" or "hidrokit".
+            Defaults to "numpy".
+        single_pass (bool, optional): Whether to assign all periods in one pass
+            and reduce coarser periods from finer ones (numpy engine only).
+            Defaults to True.
 
     Returns:
         list: A list of summary statistics for each time period.
@@ -132,89 +305,516 @@ def generate_summary_all(dataframe, n_days: list = None):
     """
     n_days = ["16D", "1MS", "1YS"] if n_days is None else n_days
 
+    if isinstance(dataframe, pycompact.WetDayFrame):
+        if engine == "numpy":
+            return [
+                summary.infer_objects()
+                for summary in pysummary.summarize_all(dataframe, n_days=n_days)
+            ]
+        dataframe = dataframe.to_dataframe()
+
+    # stations are independent, shards are merged back in column order
+    results = pyparallel.map_column_shards(
+        _generate_summary_all, dataframe, n_days, engine, single_pass
+    )
+    if len(results) == 1:
+        return results[0]
+    return [pd.concat(summaries, axis=1) for summaries in zip(*results)]
+
+
+def _generate_summary_all(dataframe, n_days, engine, single_pass):
+    if engine == "numpy" and single_pass:
+        return [
+            summary.infer_objects()
+            for summary in pysummary.summarize_all(dataframe, n_days=n_days)
+        ]
+
     summary_all = []
     for n_day in n_days:
-        summary_all.append(generate_summary_single(dataframe, n_days=n_day))
+        summary_all.append(
+            generate_summary_single(dataframe, n_days=n_day, engine=engine)
+        )
 
     return summary_all
 
 
-def transform_to_dataframe(
-    table_data,
-    table_columns,
-    multiindex: bool = False,
-    apply_numeric: bool = True,
-    parse_dates: list = None,
+def combine_results(summary_all: list, cumsum: pd.DataFrame) -> pd.DataFrame:
+    """
+    Combine the summaries and the cumulative sum into one results dataframe.
+
+    Args:
+        summary_all (list): The biweekly, monthly and yearly summaries.
+        cumsum (pandas.DataFrame): The cumulative sum of each station.
+
+    Returns:
+        pandas.DataFrame: The results with (period, station, statistic) columns.
+    """
+    cumsum = cumsum.copy()
+    stations = cumsum.columns.to_list()
+    cumsum.columns = pd.MultiIndex.from_product([stations, [""]])
+
+    return pd.concat(
+        list(summary_all) + [cumsum],
+        axis=1,
+        keys=["Biweekly", "Monthly", "Yearly", "Cumulative"],
+    )
+
+
+def _convert_column(values, dtype=float):
+    """
+    Convert the values of a column to numbers in one vectorized step.
+
+    Returns the array and a boolean mask of the cells that had a value
+        but could not be converted (NaN).
+    """
+
+    try:
+        array = np.array(values, dtype=dtype)
+        return array, np.zeros(array.shape, dtype=bool)
+    except (TypeError, ValueError, OverflowError):
+        pass
+
+    # some cells are not numbers
+    column = pd.Series(values, dtype=object)
+    converted = pd.to_numeric(column, errors="coerce").astype(dtype)
+    is_empty = column.isna() | (column == "")
+    return converted.to_numpy(), (converted.isna() & ~is_empty).to_numpy()
+
+
+def apply_table_edits(
+    dataframe, table_edits: dict = None, return_coerced: bool = False
 ):
     """
-    Transform table data into a pandas DataFrame.
+    Apply the cells edited in the table to a stored dataframe.
+
+    The edits are grouped by column, the values of each column are
+        converted to numbers in one vectorized step. An edited integer
+        column becomes float64 (edits may be NaN), unedited columns
+        keep their dtype.
 
     Args:
-        table_data (list): The data to be transformed into a DataFrame.
-        table_columns (list): The column names of the table data.
-        multiindex (bool, optional): Whether to create a multi-index DataFrame.
-            Defaults to False.
-        apply_numeric (bool, optional): Whether to apply numeric conversion to the DataFrame.
-            Defaults to True.
-        parse_dates (list, optional): The column names to parse as dates.
-            Defaults to None.
+        dataframe (pandas.DataFrame): The dataframe stored at upload time.
+        table_edits (dict, optional): The edited cells as
+            {row_id: {column_id: value}}, where row_id is the row position
+            in the stored dataframe. Defaults to None.
+        return_coerced (bool, optional): Whether to also return the edited
+            cells that are not numbers. Defaults to False.
 
     Returns:
-        pandas.DataFrame: The transformed DataFrame.
+        pandas.DataFrame: A copy of the dataframe with the edits applied.
+            With return_coerced, a tuple of the dataframe and the list of
+            (row position, column id) of the edits coerced to NaN.
     """
 
-    if multiindex is True:
-        dataframe = pd.DataFrame(table_data)
-        dataframe.columns = pd.MultiIndex.from_tuples(
-            [item["name"] for item in table_columns]
+    dataframe = dataframe.copy()
+
+    column_edits = {}
+    for row, edits in (table_edits or {}).items():
+        for column_id, value in edits.items():
+            if column_id in dataframe.columns:
+                rows, values = column_edits.setdefault(column_id, ([], []))
+                rows.append(int(row))
+                values.append(value)
+
+    coerced = []
+    for column_id, (rows, values) in column_edits.items():
+        converted, is_coerced = _convert_column(values)
+        position = dataframe.columns.get_loc(column_id)
+        column = dataframe.iloc[:, position]
+        # edited cells may become NaN, integer columns can not hold it
+        is_number = pd.api.types.is_float_dtype(column) or (
+            pd.api.types.is_integer_dtype(column)
         )
-    else:
-        columns = pd.Index([item["name"] for item in table_columns])
-        dataframe = pd.DataFrame(table_data, columns=columns)
+        column = column.to_numpy(dtype=float if is_number else object, copy=True)
+        column[rows] = converted
+        dataframe.isetitem(position, column)
+        coerced.extend((row, column_id) for row, flag in zip(rows, is_coerced) if flag)
 
-    dataframe["DATE"] = pd.to_datetime(dataframe.DATE)
-    dataframe = dataframe.set_index("DATE").sort_index()
+    if return_coerced:
+        return dataframe, sorted(coerced)
+    return dataframe
 
-    if multiindex is True:
-        # removing date (index.name) from top level multiindex
-        dataframe.columns = pd.MultiIndex.from_tuples(dataframe.columns.to_flat_index())
 
-    if apply_numeric is True:
-        dataframe = dataframe.apply(pd.to_numeric, errors="coerce")
-    else:
-        dataframe = dataframe.infer_objects()
-
-    if parse_dates is not None:
-        if multiindex:
-            for col_dates in parse_dates:
-                col_parsing = [
-                    col_tuple
-                    for col_tuple in dataframe.columns
-                    if col_dates in col_tuple
-                ]
-                for col_dates in col_parsing:
-                    dataframe[col_dates] = pd.to_datetime(
-                        dataframe[col_dates], errors="coerce"
-                    )
+def _to_numeric_columns(dataframe):
+    """
+    Convert the non-numeric columns of a dataframe to numbers.
+
+    Returns the dataframe and the number of cells coerced to NaN per column.
+    """
+
+    coerced = {}
+    for position, (name, column) in enumerate(dataframe.items()):
+        if pd.api.types.is_numeric_dtype(column):
+            continue
+        if pd.api.types.is_object_dtype(column) or pd.api.types.is_string_dtype(column):
+            converted, is_coerced = _convert_column(column.to_numpy(dtype=object))
+            if is_coerced.any():
+                coerced[name] = int(is_coerced.sum())
         else:
-            for col_dates in parse_dates:
-                dataframe[col_dates] = pd.to_datetime(
-                    dataframe[col_dates], errors="coerce"
-                )
+            converted = pd.to_numeric(column, errors="coerce")
+        dataframe.isetitem(position, converted)
+
+    return dataframe, coerced
+
+
+_FILTER_OPERATORS = {
+    ">=": "ge",
+    "<=": "le",
+    "<": "lt",
+    ">": "gt",
+    "!=": "ne",
+    "=": "eq",
+}
+
+_FILTER_PATTERN = re.compile(
+    r"^\{(?P<column>[^}]*)\}\s+"
+    r"(?P<operator>[si]?(?:>=|<=|!=|<|>|=|ge|le|lt|gt|ne|eq|contains"
+    r"|datestartswith|is not blank|is blank))"
+    r"(?:\s+(?P<value>.*))?$"
+)
+
+
+def parse_filter_query(filter_query: str) -> list:
+    """
+    Parse a DataTable filter query (e.g. "{A} > 10 && {DATE} datestartswith 2008").
+
+    Only the expressions joined by "&&" that the DataTable filter row
+        produces are supported, invalid expressions are ignored.
+
+    Args:
+        filter_query (str): The filter query of the DataTable.
+
+    Returns:
+        list: A list of (column_id, operator, value) tuples, where operator is
+            one of ge, le, lt, gt, ne, eq, contains, datestartswith,
+            blank or not blank.
+    """
+
+    filters = []
+    for part in (filter_query or "").split(" && "):
+        match = _FILTER_PATTERN.match(part.strip())
+        if match is None:
+            continue
+
+        operator = match["operator"]
+        if operator[0] in "si" and operator[1:] and not operator.startswith("is "):
+            operator = operator[1:]
+        operator = _FILTER_OPERATORS.get(operator, operator)
+        operator = operator.replace("is ", "")
+
+        value = (match["value"] or "").strip()
+        if len(value) > 1 and value[0] == value[-1] and value[0] in "\"'`":
+            value = value[1:-1].replace("\\" + value[0], value[0])
+        else:
+            try:
+                value = float(value)
+            except ValueError:
+                pass
+
+        filters.append((match["column"], operator, value))
+
+    return filters
+
+
+def query_table_rows(dataframe, filter_query: str = None, sort_by: list = None):
+    """
+    Find the rows of a dataframe matching a DataTable filter query and sort order.
+
+    Args:
+        dataframe (pandas.DataFrame): The dataframe (columns are the table column ids,
+            the index is the DATE column).
+        filter_query (str, optional): The filter query of the DataTable.
+            Defaults to None.
+        sort_by (list, optional): The sort_by property of the DataTable.
+            Defaults to None.
+
+    Returns:
+        numpy.ndarray: The positions of the matching rows, in sorted order.
+    """
+
+    def column_values(column_id):
+        if column_id == "DATE":
+            return pd.Series(pd.to_datetime(dataframe.index).normalize())
+        return pd.to_numeric(
+            dataframe[column_id].reset_index(drop=True), errors="coerce"
+        )
+
+    mask = np.ones(len(dataframe), dtype=bool)
+    for column_id, operator, value in parse_filter_query(filter_query):
+        if column_id != "DATE" and column_id not in dataframe.columns:
+            continue
+
+        values = column_values(column_id)
+        if operator in ("contains", "datestartswith"):
+            if column_id == "DATE":
+                text = values.dt.strftime("%Y-%m-%d")
+            else:
+                text = dataframe[column_id].reset_index(drop=True).astype(str)
+            value = f"{value:g}" if isinstance(value, float) else str(value)
+            if operator == "contains":
+                matched = text.str.contains(value, regex=False)
+            else:
+                matched = text.str.startswith(value)
+        elif operator == "blank":
+            matched = values.isna()
+        elif operator == "not blank":
+            matched = values.notna()
+        else:
+            if column_id == "DATE":
+                value = pd.to_datetime(str(value).removesuffix(".0"), errors="coerce")
+            elif not isinstance(value, float):
+                value = pd.to_numeric(value, errors="coerce")
+            matched = getattr(values, operator)(value)
+        mask &= matched.fillna(False).to_numpy(dtype=bool)
+
+    positions = np.flatnonzero(mask)
+
+    if sort_by:
+        sort_frame = pd.DataFrame(
+            {
+                f"sort_{counter}": column_values(item["column_id"]).to_numpy()[
+                    positions
+                ]
+                for counter, item in enumerate(sort_by)
+            }
+        )
+        order = sort_frame.sort_values(
+            list(sort_frame.columns),
+            ascending=[item["direction"] == "asc" for item in sort_by],
+            kind="stable",
+        ).index
+        positions = positions[order]
+
+    return positions
+
+
+def transform_stored_dataframe(
+    dataframe,
+    table_columns,
+    table_edits: dict = None,
+    filter_query: str = None,
+    sort_by: list = None,
+):
+    """
+    Transform a stored dataframe into the DataFrame currently shown in the table.
+
+    This gives the table's derived_virtual_data as numbers with a DATE index,
+        without sending the table data back to the server.
+
+    A wet-day frame (see pycompact) is returned as is (with the DATE index)
+        when the table is unchanged, otherwise it is restored to a dataframe.
+
+    Args:
+        dataframe (pandas.DataFrame or pycompact.WetDayFrame): The dataframe
+            stored at upload time.
+        table_columns (list): The current columns of the table
+            (renamed or deleted columns are applied).
+        table_edits (dict, optional): The edited cells as
+            {row_id: {column_id: value}}. Defaults to None.
+        filter_query (str, optional): The filter query of the table. Defaults to None.
+        sort_by (list, optional): The sort_by property of the table. Defaults to None.
+
+    Returns:
+        pandas.DataFrame or pycompact.WetDayFrame: The transformed DataFrame.
+    """
+
+    if isinstance(dataframe, pycompact.WetDayFrame):
+        columns = [
+            (item["id"], item["name"]) for item in table_columns if item["id"] != "DATE"
+        ]
+        index = dataframe.index.normalize().rename("DATE")
+        is_unchanged = (
+            not (table_edits or filter_query or sort_by)
+            and columns == [(name, name) for name in dataframe.columns]
+            and index.is_monotonic_increasing
+        )
+        if is_unchanged:
+            return dataclasses.replace(dataframe, index=index)
+        dataframe = dataframe.to_dataframe()
+
+    dataframe, coerced_edits = apply_table_edits(
+        dataframe, table_edits, return_coerced=True
+    )
+    if coerced_edits:
+        logger.warning(
+            "%d edited cells are not numbers and were read as NaN: %s",
+            len(coerced_edits),
+            coerced_edits,
+        )
+
+    if filter_query or sort_by:
+        dataframe = dataframe.iloc[query_table_rows(dataframe, filter_query, sort_by)]
+
+    column_ids = [item["id"] for item in table_columns if item["id"] != "DATE"]
+    dataframe = dataframe[column_ids]
+    dataframe.columns = pd.Index(
+        [item["name"] for item in table_columns if item["id"] != "DATE"]
+    )
+    dataframe.index = pd.to_datetime(dataframe.index).normalize().rename("DATE")
+
+    if not dataframe.index.is_monotonic_increasing:
+        dataframe = dataframe.sort_index()
+    dataframe, coerced = _to_numeric_columns(dataframe)
+    if coerced:
+        logger.warning("cells coerced to NaN per column: %s", coerced)
 
     return dataframe
 
 
+def diff_table_edits(previous_edits: dict, table_edits: dict) -> list:
+    """
+    Return the cells whose edited value differs between two sets of table edits.
+
+    Args:
+        previous_edits (dict): The edited cells of the previous analysis as
+            {row_id: {column_id: value}}, or None.
+        table_edits (dict): The current edited cells, or None.
+
+    Returns:
+        list: The sorted (row position, column id) of the changed cells.
+    """
+    previous_edits = previous_edits or {}
+    table_edits = table_edits or {}
+
+    cells = []
+    for row in previous_edits.keys() | table_edits.keys():
+        before = previous_edits.get(row, {})
+        after = table_edits.get(row, {})
+        for column_id in before.keys() | after.keys():
+            if before.get(column_id) != after.get(column_id):
+                cells.append((int(row), column_id))
+    return sorted(cells)
+
+
+def locate_edited_cells(stored_index, table_columns: list, cells: list) -> list:
+    """
+    Locate edited cells of the table in the transformed DataFrame.
+
+    Args:
+        stored_index (pandas.Index): The index of the dataframe stored at upload time.
+        table_columns (list): The current columns of the table.
+        cells (list): The (row position, column id) of the cells,
+            see diff_table_edits.
+
+    Returns:
+        list: The (date, station) of the cells, cells of deleted columns are skipped.
+    """
+    names = {item["id"]: item["name"] for item in table_columns if item["id"] != "DATE"}
+    rows = [row for row, column_id in cells if column_id in names]
+    dates = pd.to_datetime(stored_index[rows]).normalize()
+    stations = [names[column_id] for _, column_id in cells if column_id in names]
+    return list(zip(dates, stations))
+
+
+def update_analysis(dataframe, summary_all: list, cumsum, cells: list, n_days: list):
+    """
+    Recompute only the station x period bins of the analysis touched by edited cells.
+
+    Args:
+        dataframe (pandas.DataFrame): The table DataFrame with the edits applied,
+            see transform_stored_dataframe.
+        summary_all (list): The previous summary dataframes, one per period.
+        cumsum (pandas.DataFrame): The previous cumulative sum dataframe.
+        cells (list): The (date, station) of the changed cells,
+            see locate_edited_cells.
+        n_days (list): The periods of summary_all.
+
+    Returns:
+        tuple: The updated summary dataframes (list), the updated cumulative sum
+            (pandas.DataFrame) and the positions of the updated rows of
+            each summary then of the cumulative sum (list of numpy.ndarray).
+    """
+    stations = dataframe.columns[dataframe.columns.isin({name for _, name in cells})]
+    if stations.empty:
+        return list(summary_all), cumsum, [np.array([], dtype=int)] * (len(n_days) + 1)
+    station_positions = dataframe.columns.get_indexer(stations)
+    is_edited = dataframe.index.isin(pd.DatetimeIndex([date for date, _ in cells]))
+
+    updated_all = []
+    updated_rows = []
+    for n_day, summary in zip(n_days, summary_all):
+        labels, _ = pysummary.assign_period_labels(dataframe.index, n_day)
+        bins = labels[is_edited].unique().sort_values().rename(summary.index.name)
+        rows = np.flatnonzero(labels.isin(bins))
+        partial = pysummary.summarize_bins(
+            dataframe.iloc[rows, station_positions], labels[rows], bins
+        )
+
+        # an edited integer station becomes float, the whole column follows
+        summary = summary.astype(partial.dtypes.to_dict())
+        positions = summary.index.get_indexer(partial.index)
+        column_positions = summary.columns.get_indexer(partial.columns)
+        for column, position in zip(partial.columns, column_positions):
+            summary.iloc[positions, position] = partial[column].to_numpy()
+        updated_all.append(summary)
+        updated_rows.append(positions)
+
+    # a cumulative sum changes from the edited year onward, only edited stations
+    station_cumsum = calculate_cumulative_sum(dataframe[stations])
+    is_changed = cumsum[stations].to_numpy() != station_cumsum.to_numpy()
+    cumsum = cumsum.copy()
+    for station in stations:
+        cumsum[station] = station_cumsum[station]
+    updated_rows.append(np.flatnonzero(is_changed.any(axis=1)))
+
+    return updated_all, cumsum, updated_rows
+
+
 def calculate_cumulative_sum(dataframe):
     """
     Calculate the cumulative sum of a DataFrame by resampling it on a yearly basis.
 
     Parameters:
-    dataframe (pandas.DataFrame): The input DataFrame containing the data.
+    dataframe (pandas.DataFrame or pycompact.WetDayFrame): The input DataFrame
+        containing the data.
 
     Returns:
     pandas.DataFrame: The DataFrame with the cumulative sum rounded to the nearest integer.
     """
+    if isinstance(dataframe, pycompact.WetDayFrame):
+        labels, years = pysummary.assign_period_labels(dataframe.index, "YS")
+        yearly = pycompact.sum_by_label(
+            dataframe, years.get_indexer(labels), years.size
+        )
+        consistency = pd.DataFrame(
+            yearly.cumsum(axis=0),
+            index=years.rename(dataframe.index.name),
+            columns=dataframe.columns,
+        )
+        return consistency.round()
+
     consistency = dataframe.resample("YS").sum().cumsum()
 
     return consistency.round()
+
+
+def calculate_double_mass(cumulative_sum_df: pd.DataFrame):
+    """
+    Calculate the double-mass reference and trendline of every station at once.
+
+    The reference of a station is the mean of all other stations,
+        computed from a single row sum as (total - self) / (N - 1),
+        skipping missing values like DataFrame.mean does.
+
+    Args:
+        cumulative_sum_df (pandas.DataFrame): The cumulative sum of each station.
+
+    Returns:
+        tuple: The reference mean of each station (pandas.DataFrame, same shape)
+            and the slope, intercept and r2 of each station against its reference
+            (pandas.DataFrame, see pyregression.fit_ols).
+    """
+    values = cumulative_sum_df.to_numpy(dtype="float64")
+    is_valid = ~np.isnan(values)
+    total = np.nansum(values, axis=1, keepdims=True)
+    count = is_valid.sum(axis=1, keepdims=True)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        reference = (total - np.where(is_valid, values, 0.0)) / (count - is_valid)
+
+    reference_df = pd.DataFrame(
+        reference, index=cumulative_sum_df.index, columns=cumulative_sum_df.columns
+    )
+    fits = pyregression.fit_ols(cumulative_sum_df, reference_df)
+
+    return reference_df, fits
@@ -4,14 +4,10 @@ This module defines the layout components for a Dash application used for rainfa
 
 from dash import html, dcc
 import dash_bootstrap_components as dbc
-import plotly.io as pio
 from pyconfig import appConfig
-from pytemplate import hktemplate
 import pyfigure
 import pylayoutfunc
 
-pio.templates.default = hktemplate
-
 HTML_TITLE = html.Div(
     [
         html.H1(
@@ -60,7 +56,7 @@ DCC_UPLOAD = html.Div(
         children=html.Div(
             [
                 dbc.Button(
-                    "Upload File (.csv)",
+                    "Upload File (.csv, .parquet)",
                     color="primary",
                     outline=False,
                     class_name="fs-4 text-center",
@@ -157,6 +153,15 @@ HTML_ROW_BUTTON_EXAMPLE = html.Div(
     )
 )
 
+HTML_STORE = html.Div(
+    [
+        dcc.Store(id="store-dataset-id"),
+        dcc.Store(id="store-table-edits"),
+        dcc.Store(id="store-graph-rainfall"),
+        dcc.Store(id="store-analysis-id"),
+    ]
+)
+
 HTML_ROW_TABLE = html.Div(
     dbc.Container(
         [
@@ -199,6 +204,13 @@ HTML_ROW_BUTTON_VIZ = html.Div(
                                 className="fs-4",
                                 id="button-download-csv",
                             ),
+                            dbc.Button(
+                                "Parquet",
+                                color="primary",
+                                outline=True,
+                                className="fs-4 ms-2",
+                                id="button-download-parquet",
+                            ),
                             dcc.Download(id="download-csv"),
                         ],
                         width="auto",
@@ -277,12 +289,35 @@ HTML_ROW_BUTTON_ANALYZE = html.Div(
                                 id="button-analyze",
                                 disabled=True,
                             ),
+                            dbc.Button(
+                                "Cancel",
+                                color="secondary",
+                                className="fs-4",
+                                outline=True,
+                                id="button-cancel-analyze",
+                                disabled=True,
+                            ),
                         ],
                         width="auto",
                     )
                 ],
                 justify="center",
-            )
+            ),
+            dbc.Row(
+                dbc.Col(
+                    dbc.Progress(
+                        id="progress-analyze",
+                        value=0,
+                        max=1,
+                        striped=True,
+                        animated=True,
+                        class_name="mt-3",
+                        style={"visibility": "hidden"},
+                    ),
+                    width=6,
+                ),
+                justify="center",
+            ),
         ],
         fluid=True,
         class_name="my-5",
@@ -330,6 +365,13 @@ HTML_ROW_BUTTON_VIZ_ANALYSIS = html.Div(
                                 className="fs-4",
                                 id="button-download-analysis-csv",
                             ),
+                            dbc.Button(
+                                "Parquet",
+                                color="primary",
+                                outline=True,
+                                className="fs-4 ms-2",
+                                id="button-download-analysis-parquet",
+                            ),
                             dcc.Download(id="download-analysis-csv"),
                         ],
                         width="auto",
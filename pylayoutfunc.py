@@ -10,6 +10,28 @@ import dash_bootstrap_components as dbc
 from pytemplate import hktemplate
 
 
+def create_table_records(dataframe, row_ids=None):
+    """
+    Convert a dataframe into DataTable records with a DATE column.
+
+    Args:
+        dataframe (pandas.DataFrame): The input dataframe with a datetime index.
+        row_ids (list, optional): The row ids ("id" key of each record).
+            Defaults to None (no row ids).
+
+    Returns:
+        list: A list of records (dict).
+    """
+
+    new_dataframe = dataframe.rename_axis("DATE").reset_index()
+    new_dataframe.DATE = new_dataframe.DATE.dt.date
+
+    if row_ids is not None:
+        new_dataframe["id"] = row_ids
+
+    return new_dataframe.to_dict("records")
+
+
 def create_table_layout(
     dataframe,
     idtable,
@@ -18,6 +40,8 @@ def create_table_layout(
     editable: list | bool = False,
     deletable=True,
     renamable=False,
+    server_side=False,
+    page_size=20,
 ):
     """
     Create a table layout using the given dataframe.
@@ -32,20 +56,32 @@ def create_table_layout(
             or a single boolean value to be applied to all columns. Defaults to False.
         deletable (bool, optional): Whether the columns are deletable. Defaults to True.
         renamable (bool, optional): Whether the columns are renamable. Defaults to False.
+        server_side (bool, optional): Whether paging, filtering and sorting are done
+            by a server callback. Only the first page is included, and each
+            record has its row position as "id". Defaults to False.
+        page_size (int, optional): The number of rows per page. Defaults to 20.
 
     Returns:
         tuple: A tuple containing the title element and the DataTable component.
     """
 
-    new_dataframe = dataframe.rename_axis("DATE").reset_index()
-    new_dataframe.DATE = new_dataframe.DATE.dt.date
+    column_names = ["DATE"] + dataframe.columns.to_list()
 
     editable = (
-        editable
-        if isinstance(editable, Iterable)
-        else [editable] * len(new_dataframe.columns)
+        editable if isinstance(editable, Iterable) else [editable] * len(column_names)
     )
 
+    if server_side:
+        data = create_table_records(
+            dataframe.iloc[:page_size], row_ids=range(min(page_size, len(dataframe)))
+        )
+        table_action = "custom"
+        page_count = max(1, -(-len(dataframe) // page_size))
+    else:
+        data = create_table_records(dataframe)
+        table_action = "native"
+        page_count = None
+
     table = dash_table.DataTable(
         id=idtable,
         columns=[
@@ -56,13 +92,16 @@ def create_table_layout(
                 "renamable": renamable,
                 "editable": edit_col,
             }
-            for i, edit_col in zip(new_dataframe.columns, editable)
+            for i, edit_col in zip(column_names, editable)
         ],
-        data=new_dataframe.to_dict("records"),
-        page_size=20,
+        data=data,
+        page_size=page_size,
+        page_current=0,
+        page_action=table_action,
+        page_count=page_count,
         cell_selectable=True,
-        filter_action="native",
-        sort_action="native",
+        filter_action=table_action,
+        sort_action=table_action,
         style_table={"overflowX": "auto"},
         style_cell={"font-family": hktemplate.layout.font.family},
         style_header={"font-size": 20, "textAlign": "center", "font-weight": "bold"},
@@ -76,6 +115,28 @@ def create_table_layout(
     return html.H2(title_table, className="text-center"), table
 
 
+def create_table_summary_records(summary):
+    """
+    Convert a summary into DataTable records with flattened column ids.
+
+    Args:
+        summary (pandas.DataFrame): The summary with (station, statistic) columns.
+
+    Returns:
+        tuple: The column names (tuples), the column ids ("station_statistic")
+            and the records (list of dict).
+    """
+
+    new_summary = summary.rename_axis("DATE").reset_index()
+    new_summary.DATE = new_summary.DATE.dt.date
+
+    flatten_index = new_summary.columns.to_flat_index()
+    new_id = ["_".join(colx) if colx[1] != "" else colx[0] for colx in flatten_index]
+    new_summary.columns = new_id
+
+    return flatten_index, new_id, new_summary.to_dict("records")
+
+
 def create_table_summary(
     summary,
     idtable,
@@ -100,12 +161,7 @@ def create_table_summary(
         dash_table.DataTable: The created DataTable component.
     """
 
-    new_summary = summary.rename_axis("DATE").reset_index()
-    new_summary.DATE = new_summary.DATE.dt.date
-
-    flatten_index = new_summary.columns.to_flat_index()
-    new_id = ["_".join(colx) if colx[1] != "" else colx[0] for colx in flatten_index]
-    new_summary.columns = new_id
+    flatten_index, new_id, records = create_table_summary_records(summary)
 
     table = dash_table.DataTable(
         id=idtable,
@@ -113,7 +169,7 @@ def create_table_summary(
             {"name": name, "id": id, "deletable": deletable, "renamable": renamable}
             for name, id in zip(flatten_index, new_id)
         ],
-        data=new_summary.to_dict("records"),
+        data=records,
         page_size=20,
         editable=editable,
         cell_selectable=True,
@@ -166,6 +222,24 @@ def create_tabcard_table_layout(
     return dbc.Tabs(tab, active_tab=active_tab)
 
 
+def patch_tabcard_table_rows(patched_tabs, position: int, rows: list, records: list):
+    """
+    Replace some rows of a table in a layout from create_tabcard_table_layout.
+
+    Args:
+        patched_tabs (dash.Patch): The patch of the tabbed card layout.
+        position (int): The position of the tab (and table).
+        rows (list): The row positions in the table data.
+        records (list): The new records, one per row.
+    """
+
+    # dbc.Tab > dbc.Card > dbc.CardBody > [table]
+    table = patched_tabs["props"]["children"][position]["props"]["children"]
+    table = table["props"]["children"]["props"]["children"][0]
+    for row, record in zip(rows, records):
+        table["props"]["data"][int(row)] = record
+
+
 def create_tabcard_graph_layout(
     graphs: list[dcc.Graph],
     tab_names: list = None,
@@ -205,6 +279,55 @@ def create_tabcard_graph_layout(
     return dbc.Tabs(tab, active_tab=active_tab)
 
 
+def create_tabcard_lazy_graph_layout(
+    tab_names: list,
+    idtabs: str,
+    disabled: list = None,
+    active_tab: str = None,
+):
+    """
+    Create a layout with tabs and a single card for the graph of the active tab.
+
+    The card starts with a placeholder, its content (id "{idtabs}-content")
+        is filled by a callback on the "active_tab" property of the tabs,
+        so only the graphs that are viewed are generated.
+
+    Args:
+        tab_names (list): A list of tab names.
+        idtabs (str): The ID of the Tabs component.
+        disabled (list, optional): A list of boolean values indicating whether
+            each tab is disabled. Defaults to None.
+        active_tab (str, optional): The ID of the active tab.
+            Defaults to the first tab.
+
+    Returns:
+        html.Div: A Div containing the Tabs and the card of the active tab.
+    """
+
+    disabled = [False] * len(tab_names) if disabled is None else disabled
+
+    tab = [
+        dbc.Tab(label=tab_name, disabled=active, tab_id=tab_name)
+        for tab_name, active in zip(tab_names, disabled)
+    ]
+
+    active_tab = tab_names[0] if active_tab is None else active_tab
+
+    return html.Div(
+        [
+            dbc.Tabs(tab, id=idtabs, active_tab=active_tab),
+            dbc.Card(
+                dbc.CardBody(
+                    dcc.Loading(
+                        html.Div(style={"minHeight": 450}), id=f"{idtabs}-content"
+                    )
+                ),
+                class_name="my-3",
+            ),
+        ]
+    )
+
+
 def create_html_alert(alert: dbc.Alert, class_name: str = "my-2"):
     """
     Creates an HTML alert container with the specified alert component and class name.
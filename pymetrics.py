@@ -0,0 +1,201 @@
+"""
+This module contains the instrumentation layer, recording wall time,
+    peak memory and payload bytes per callback and per stage
+    as structured (JSON) logs and as Prometheus metrics served on /metrics.
+
+The metrics are kept in a diskcache directory, so callbacks running in
+    background processes and in other gunicorn workers are aggregated together.
+"""
+
+import functools
+import json
+import logging
+import resource
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+import diskcache
+import flask
+from pyconfig import appConfig
+
+logger = logging.getLogger(__name__)
+
+METRICS = diskcache.Cache(appConfig.METRICS.DIRECTORY)
+TRACE_MEMORY = bool(appConfig.METRICS.TRACE_MEMORY)
+
+_HELP = {
+    "rainfall_callback_seconds": ("summary", "Wall time of Dash callbacks."),
+    "rainfall_callback_peak_memory_bytes": (
+        "gauge",
+        "Peak traced memory of the last run of Dash callbacks.",
+    ),
+    "rainfall_stage_seconds": ("summary", "Wall time of callback stages."),
+    "rainfall_stage_peak_memory_bytes": (
+        "gauge",
+        "Peak traced memory of the last run of callback stages.",
+    ),
+    "rainfall_response_bytes": ("summary", "Payload bytes of callback responses."),
+    "rainfall_process_max_rss_bytes": (
+        "gauge",
+        "Maximum resident set size of the worker serving the scrape.",
+    ),
+}
+
+_local = threading.local()
+
+
+def _observe(name: str, label: str, value: float):
+    METRICS.incr((name, label, "sum"), value)
+    METRICS.incr((name, label, "count"), 1)
+
+
+def _set_gauge(name: str, label: str, value: float):
+    METRICS.set((name, label, "value"), value)
+
+
+@contextmanager
+def _measure(kind: str, name: str):
+    # tracemalloc.reset_peak is global, parents keep the peak of their children
+    stack = _local.__dict__.setdefault("stack", [])
+    frame = {"peak": 0}
+    if TRACE_MEMORY:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        frame["start"] = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+    stack.append(frame)
+
+    start = time.perf_counter()
+    status = "ok"
+    try:
+        yield
+    except Exception:
+        status = "error"
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        stack.pop()
+
+        record = {"event": kind, kind: name, "seconds": round(elapsed, 6)}
+        record["status"] = status
+        _observe(f"rainfall_{kind}_seconds", name, elapsed)
+
+        if TRACE_MEMORY:
+            peak = max(frame["peak"], tracemalloc.get_traced_memory()[1])
+            peak_bytes = max(0, peak - frame["start"])
+            if stack:
+                stack[-1]["peak"] = max(stack[-1]["peak"], peak)
+            record["peak_memory_bytes"] = peak_bytes
+            _set_gauge(f"rainfall_{kind}_peak_memory_bytes", name, peak_bytes)
+
+        logger.info(json.dumps(record))
+
+
+@contextmanager
+def stage(name: str):
+    """
+    Measure a stage of a callback.
+
+    Args:
+        name (str): The stage name (e.g. "analyze.summary").
+    """
+    with _measure("stage", name):
+        yield
+
+
+def instrument_callback(func):
+    """
+    Decorate a Dash callback to measure its wall time and peak memory.
+
+    Place it below the @app.callback decorator.
+
+    Args:
+        func (callable): The callback function.
+
+    Returns:
+        callable: The wrapped callback.
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with _measure("callback", func.__name__):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def record_response(response: flask.Response) -> flask.Response:
+    """
+    Record the payload bytes of a Dash callback response (Flask after_request hook).
+
+    Args:
+        response (flask.Response): The response.
+
+    Returns:
+        flask.Response: The same response.
+    """
+    if flask.request.path.endswith("/_dash-update-component"):
+        body = flask.request.get_json(silent=True) or {}
+        # the first output id identifies the callback, e.g. "tab-analysis.children"
+        output = str(body.get("output", "")).lstrip(".").split("...")[0]
+        if response.content_length is not None:
+            _observe("rainfall_response_bytes", output, response.content_length)
+            logger.info(
+                json.dumps(
+                    {
+                        "event": "response",
+                        "output": output,
+                        "bytes": response.content_length,
+                    }
+                )
+            )
+    return response
+
+
+def _escape(label: str) -> str:
+    return label.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_prometheus(extra: dict = None) -> str:
+    """
+    Render all metrics in the Prometheus text exposition format.
+
+    Args:
+        extra (dict, optional): Additional gauges, name to (help, value).
+            Defaults to None.
+
+    Returns:
+        str: The metrics text.
+    """
+    _set_gauge(
+        "rainfall_process_max_rss_bytes",
+        "",
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+    )
+
+    samples = {}
+    for key in METRICS.iterkeys():
+        name, label, suffix = key
+        value = METRICS.get(key)
+        if value is not None:
+            samples.setdefault(name, []).append((label, suffix, value))
+
+    label_key = {"callback": "callback", "stage": "stage", "response": "output"}
+    lines = []
+    for name in sorted(samples):
+        kind, description = _HELP.get(name, ("gauge", name))
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {kind}")
+        label_name = label_key.get(name.split("_")[1], "name")
+        for label, suffix, value in sorted(samples[name]):
+            metric = name if suffix == "value" else f"{name}_{suffix}"
+            labels = f'{{{label_name}="{_escape(label)}"}}' if label else ""
+            lines.append(f"{metric}{labels} {value}")
+
+    for name, (description, value) in (extra or {}).items():
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {value}")
+
+    return "\n".join(lines) + "\n"
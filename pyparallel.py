@@ -0,0 +1,136 @@
+"""
+This module contains an opt-in executor layer that shards station columns
+    across a process or thread pool and returns the results in station order,
+    so merging them gives the same output as the sequential computation.
+"""
+
+import atexit
+import contextlib
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from pyconfig import appConfig
+
+_EXECUTORS = {}
+_LOCK = threading.Lock()
+# the process that owns the shared executors, forked processes
+# (e.g. background callback jobs) inherit them but can not use them
+_OWNER_PID = os.getpid()
+
+
+def get_max_workers() -> int:
+    """
+    Return the number of workers of the pool.
+
+    Returns:
+        int: PARALLEL.MAX_WORKERS from app_config.yml, or the number of CPUs if empty.
+    """
+    return appConfig.PARALLEL.MAX_WORKERS or os.cpu_count() or 1
+
+
+def _create_executor(kind: str):
+    pool = ProcessPoolExecutor if kind == "process" else ThreadPoolExecutor
+    return pool(max_workers=get_max_workers())
+
+
+def get_executor(kind: str = None):
+    """
+    Return the shared executor, creating it on first use.
+
+    The shared executors are shut down when the process exits.
+
+    Args:
+        kind (str, optional): "process" or "thread".
+            Defaults to PARALLEL.EXECUTOR from app_config.yml.
+
+    Returns:
+        concurrent.futures.Executor: The executor.
+    """
+    kind = appConfig.PARALLEL.EXECUTOR if kind is None else kind
+
+    with _LOCK:
+        if kind not in _EXECUTORS:
+            _EXECUTORS[kind] = _create_executor(kind)
+        return _EXECUTORS[kind]
+
+
+@atexit.register
+def shutdown_executors():
+    """Shut down the shared executors of this process."""
+    if os.getpid() != _OWNER_PID:
+        return
+    with _LOCK:
+        for executor in _EXECUTORS.values():
+            executor.shutdown(cancel_futures=True)
+        _EXECUTORS.clear()
+
+
+def _use_executor():
+    """
+    Return a context giving the executor for one map_column_shards call.
+
+    The owner process uses the shared executor. A forked process
+        (e.g. a background callback job) gets its own executor,
+        shut down when the call ends.
+    """
+    if os.getpid() == _OWNER_PID:
+        return contextlib.nullcontext(get_executor())
+    return _create_executor(appConfig.PARALLEL.EXECUTOR)
+
+
+def count_shards(n_stations: int) -> int:
+    """
+    Return the number of station shards, 1 when parallelism is not used.
+
+    Args:
+        n_stations (int): The number of stations.
+
+    Returns:
+        int: The number of shards.
+    """
+    if not appConfig.PARALLEL.ENABLED or n_stations < appConfig.PARALLEL.MIN_STATIONS:
+        return 1
+    return max(1, min(get_max_workers(), n_stations))
+
+
+def _select_stations(dataframe: pd.DataFrame, stations: pd.Index) -> pd.DataFrame:
+    return dataframe.loc[:, dataframe.columns.get_level_values(0).isin(stations)]
+
+
+def map_column_shards(func, dataframes, *args, **kwargs) -> list:
+    """
+    Apply a function to contiguous shards of station columns.
+
+    The stations are the columns (or first column level) of the dataframes.
+        Each shard keeps the original column order and the results are returned
+        in shard order, so concatenating them is deterministic.
+
+    Args:
+        func (callable): The function, called as func(shard, *args, **kwargs).
+            It must be picklable (defined at module level) for a process pool.
+        dataframes (pandas.DataFrame or list): A dataframe, or a list of
+            dataframes sharing the same stations (sharded together).
+        *args: The positional arguments for the function.
+        **kwargs: The keyword arguments for the function.
+
+    Returns:
+        list: The result of each shard, a single result when not parallel.
+    """
+    is_single = isinstance(dataframes, pd.DataFrame)
+    frames = [dataframes] if is_single else list(dataframes)
+    stations = frames[0].columns.get_level_values(0).unique()
+
+    n_shards = count_shards(stations.size)
+    if n_shards == 1:
+        return [func(dataframes, *args, **kwargs)]
+
+    shards = []
+    for positions in np.array_split(np.arange(stations.size), n_shards):
+        shard = [_select_stations(frame, stations[positions]) for frame in frames]
+        shards.append(shard[0] if is_single else shard)
+
+    with _use_executor() as executor:
+        futures = [executor.submit(func, shard, *args, **kwargs) for shard in shards]
+        return [future.result() for future in futures]
@@ -0,0 +1,66 @@
+"""
+This module contains a vectorized ordinary least squares (OLS) fit,
+    computing the slope, intercept and R² of every station at once
+    from closed-form sums instead of fitting one model per station.
+"""
+
+import numpy as np
+import pandas as pd
+
+REGRESSION_COLUMNS = ["slope", "intercept", "r2"]
+
+
+def fit_ols(x, y: pd.DataFrame) -> pd.DataFrame:
+    """
+    Fit y = slope * x + intercept for every column of y.
+
+    Missing values are dropped pairwise, as statsmodels does with missing="drop".
+
+    Args:
+        x (array-like or pandas.DataFrame): The regressor, either one series
+            shared by all columns or a dataframe with the same shape as y.
+        y (pandas.DataFrame): The responses, one column per station.
+
+    Returns:
+        pandas.DataFrame: The slope, intercept and r2 of each column of y.
+    """
+    y_values = y.to_numpy(dtype="float64")
+    x_values = np.asarray(x, dtype="float64")
+    if x_values.ndim == 1:
+        x_values = np.broadcast_to(x_values[:, np.newaxis], y_values.shape)
+
+    valid = ~(np.isnan(x_values) | np.isnan(y_values))
+    x_values = np.where(valid, x_values, 0.0)
+    y_values = np.where(valid, y_values, 0.0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        n_valid = valid.sum(axis=0)
+        mean_x = x_values.sum(axis=0) / n_valid
+        mean_y = y_values.sum(axis=0) / n_valid
+        dx = np.where(valid, x_values - mean_x, 0.0)
+        dy = np.where(valid, y_values - mean_y, 0.0)
+        sxx = (dx * dx).sum(axis=0)
+        sxy = (dx * dy).sum(axis=0)
+        syy = (dy * dy).sum(axis=0)
+
+        slope = sxy / sxx
+        intercept = mean_y - slope * mean_x
+        r2 = sxy * sxy / (sxx * syy)
+
+    return pd.DataFrame(
+        {"slope": slope, "intercept": intercept, "r2": r2}, index=y.columns
+    )
+
+
+def format_equation(slope: float, intercept: float) -> str:
+    """
+    Format a fitted line the way plotly express labels OLS trendlines.
+
+    Args:
+        slope (float): The slope of the line.
+        intercept (float): The intercept of the line.
+
+    Returns:
+        str: The equation (e.g. "y = 1173.68 * x + -56.1421").
+    """
+    return f"y = {slope:g} * x + {intercept:g}"
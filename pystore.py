@@ -0,0 +1,310 @@
+"""
+This module contains the server-side dataset store,
+    keeping uploaded dataframes in memory (LRU) keyed by a dataset id
+    so callbacks only exchange the id with the browser,
+    and the analysis store, keeping the typed results of an analysis
+    keyed by an analysis id.
+"""
+
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+import diskcache
+import pandas as pd
+import pycompact
+from pyconfig import appConfig
+
+
+class DatasetNotFoundError(KeyError):
+    """Raised when a dataset id is unknown or has been evicted."""
+
+
+class AnalysisNotFoundError(KeyError):
+    """Raised when an analysis id is unknown or has expired."""
+
+
+class DatasetStore:
+    """
+    A thread-safe LRU store of dataframes with an optional spill directory.
+
+    When a spill directory is set, every dataframe is also written to disk
+        as Parquet, so datasets evicted from memory (or stored by another
+        worker process) are loaded back on demand. Shared dataframes
+        (e.g. the bundled examples) are kept apart and never evicted.
+
+    With compact set, daily numeric dataframes are kept in memory as
+        wet-day frames (see pycompact), the spilled files stay dense.
+
+    Args:
+        max_items (int, optional): The maximum number of dataframes kept in memory.
+            Defaults to 16.
+        spill_directory (str, optional): The directory for spilled dataframes.
+            Defaults to None (no spilling).
+        max_spilled (int, optional): The maximum number of files kept in
+            the spill directory. Defaults to 256.
+        compact (bool, optional): Whether to keep dataframes as wet-day frames.
+            Defaults to False.
+        decimals (int, optional): The decimals kept by the wet-day frames.
+            Defaults to 3.
+    """
+
+    def __init__(
+        self,
+        max_items: int = 16,
+        spill_directory: str = None,
+        max_spilled: int = 256,
+        compact: bool = False,
+        decimals: int = 3,
+    ):
+        self.max_items = max_items
+        self.spill_directory = Path(spill_directory) if spill_directory else None
+        self.max_spilled = max_spilled
+        self.compact = compact
+        self.decimals = decimals
+        self._items = OrderedDict()
+        self._shared = {}
+        self._lock = threading.Lock()
+
+        if self.spill_directory is not None:
+            self.spill_directory.mkdir(parents=True, exist_ok=True)
+
+    def __contains__(self, dataset_id):
+        with self._lock:
+            if dataset_id in self._items or self._shared_name(dataset_id):
+                return True
+        spill_path = self._spill_path(dataset_id)
+        return spill_path is not None and spill_path.exists()
+
+    def __len__(self):
+        return len(self._items)
+
+    def put(self, dataframe: pd.DataFrame, dataset_id: str = None) -> str:
+        """
+        Store a dataframe and return its dataset id.
+
+        Args:
+            dataframe (pandas.DataFrame): The dataframe to store.
+            dataset_id (str, optional): The dataset id. Defaults to a new random id.
+
+        Returns:
+            str: The dataset id.
+        """
+        dataset_id = uuid.uuid4().hex if dataset_id is None else dataset_id
+
+        with self._lock:
+            self._items[dataset_id] = self._compact(dataframe)
+            self._items.move_to_end(dataset_id)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+        spill_path = self._spill_path(dataset_id)
+        if spill_path is not None:
+            dataframe.to_parquet(spill_path)
+            self._prune_spilled()
+
+        return dataset_id
+
+    def share(self, name: str, dataframe: pd.DataFrame):
+        """
+        Keep a dataframe in memory under a name, it is never evicted or spilled.
+
+        Args:
+            name (str): The name (without a "."), the same in every worker process.
+            dataframe (pandas.DataFrame): The dataframe to share.
+        """
+        with self._lock:
+            self._shared[name] = dataframe
+
+    def put_shared(self, name: str) -> str:
+        """
+        Return a new dataset id for a shared dataframe, without copying it.
+
+        Each call gives a new id, so the table edits of each upload stay separate.
+
+        Args:
+            name (str): The name given to share.
+
+        Returns:
+            str: The dataset id ("{name}.{random id}").
+
+        Raises:
+            DatasetNotFoundError: If no dataframe is shared under the name.
+        """
+        with self._lock:
+            if name not in self._shared:
+                raise DatasetNotFoundError(name)
+        return f"{name}.{uuid.uuid4().hex}"
+
+    def get(self, dataset_id: str, restore: bool = True):
+        """
+        Return the dataframe stored under a dataset id.
+
+        Args:
+            dataset_id (str): The dataset id.
+            restore (bool, optional): Whether to return a wet-day frame
+                as a dense dataframe. Defaults to True.
+
+        Returns:
+            pandas.DataFrame or pycompact.WetDayFrame: The stored dataframe
+                (do not modify in place).
+
+        Raises:
+            DatasetNotFoundError: If the dataset id is unknown or has been evicted.
+        """
+        with self._lock:
+            name = self._shared_name(dataset_id)
+            if name:
+                stored = self._shared[name]
+            elif dataset_id in self._items:
+                self._items.move_to_end(dataset_id)
+                stored = self._items[dataset_id]
+            else:
+                stored = None
+
+        if stored is None:
+            spill_path = self._spill_path(dataset_id)
+            if spill_path is None or not spill_path.exists():
+                raise DatasetNotFoundError(dataset_id)
+
+            stored = self._compact(pd.read_parquet(spill_path))
+            with self._lock:
+                self._items[dataset_id] = stored
+                while len(self._items) > self.max_items:
+                    self._items.popitem(last=False)
+
+        return pycompact.restore_dataframe(stored) if restore else stored
+
+    def _compact(self, dataframe):
+        if not self.compact:
+            return dataframe
+        return pycompact.compact_dataframe(dataframe, decimals=self.decimals)
+
+    def _shared_name(self, dataset_id):
+        name = str(dataset_id).split(".", 1)[0]
+        return name if "." in str(dataset_id) and name in self._shared else None
+
+    def _spill_path(self, dataset_id):
+        if self.spill_directory is None or dataset_id is None:
+            return None
+        try:
+            # only accept uuid hex ids as file names
+            filename = uuid.UUID(hex=str(dataset_id)).hex
+        except ValueError:
+            return None
+        return self.spill_directory / f"{filename}.parquet"
+
+    def _prune_spilled(self):
+        spilled = sorted(
+            self.spill_directory.glob("*.parquet"),
+            key=lambda path: path.stat().st_mtime,
+        )
+        for path in spilled[: max(0, len(spilled) - self.max_spilled)]:
+            path.unlink(missing_ok=True)
+
+
+class AnalysisStore:
+    """
+    A store of analysis results shared between processes.
+
+    The results are written to a diskcache directory, so results stored by
+        a background callback (a separate process) or by another worker
+        are readable everywhere. The most recently read results are also
+        kept in memory (LRU).
+
+    Args:
+        directory (str): The diskcache directory.
+        expire (int, optional): The seconds before a result expires.
+            Defaults to None (never).
+        max_items (int, optional): The maximum number of results kept in memory.
+            Defaults to 16.
+    """
+
+    def __init__(self, directory: str, expire: int = None, max_items: int = 16):
+        self.expire = expire
+        self.max_items = max_items
+        self._cache = diskcache.Cache(directory)
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, summary_all: list, cumsum: pd.DataFrame, source: dict = None) -> str:
+        """
+        Store the results of an analysis and return its analysis id.
+
+        Args:
+            summary_all (list): The summary dataframes (biweekly, monthly, yearly).
+            cumsum (pandas.DataFrame): The yearly cumulative sum dataframe.
+            source (dict, optional): The inputs of the analysis (dataset id,
+                table edits, ...), see get_source. Defaults to None.
+
+        Returns:
+            str: The analysis id.
+        """
+        analysis_id = uuid.uuid4().hex
+        results = (list(summary_all), cumsum)
+        self._cache.set(analysis_id, results, expire=self.expire)
+        if source is not None:
+            self._cache.set((analysis_id, "source"), source, expire=self.expire)
+        self._remember(analysis_id, results)
+        return analysis_id
+
+    def get(self, analysis_id: str) -> tuple:
+        """
+        Return the results stored under an analysis id.
+
+        Args:
+            analysis_id (str): The analysis id.
+
+        Returns:
+            tuple: The summary dataframes (list) and the cumulative sum dataframe
+                (do not modify in place).
+
+        Raises:
+            AnalysisNotFoundError: If the analysis id is unknown or has expired.
+        """
+        with self._lock:
+            if analysis_id in self._items:
+                self._items.move_to_end(analysis_id)
+                return self._items[analysis_id]
+
+        results = None if analysis_id is None else self._cache.get(analysis_id)
+        if results is None:
+            raise AnalysisNotFoundError(analysis_id)
+        self._remember(analysis_id, results)
+        return results
+
+    def get_source(self, analysis_id: str):
+        """
+        Return the inputs stored with the results of an analysis.
+
+        Args:
+            analysis_id (str): The analysis id.
+
+        Returns:
+            dict: The inputs given to put, or None if unknown or expired.
+        """
+        if analysis_id is None:
+            return None
+        return self._cache.get((analysis_id, "source"))
+
+    def _remember(self, analysis_id, results):
+        with self._lock:
+            self._items[analysis_id] = results
+            self._items.move_to_end(analysis_id)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+
+DATASETS = DatasetStore(
+    max_items=appConfig.DATASET_STORE.MAX_DATASETS,
+    spill_directory=appConfig.DATASET_STORE.SPILL_DIRECTORY,
+    max_spilled=appConfig.DATASET_STORE.MAX_SPILLED,
+    compact=appConfig.DATASET_STORE.COMPACT,
+    decimals=appConfig.DATASET_STORE.COMPACT_DECIMALS,
+)
+
+ANALYSES = AnalysisStore(
+    appConfig.ANALYSIS_STORE.DIRECTORY,
+    expire=appConfig.ANALYSIS_STORE.EXPIRE_SECONDS,
+    max_items=appConfig.ANALYSIS_STORE.MAX_ANALYSES,
+)
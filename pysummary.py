@@ -0,0 +1,381 @@
+"""
+This module contains a vectorized summary engine for daily rainfall data,
+    computing every summary statistic for every station at once
+    with grouped NumPy reductions over the whole dataframe.
+"""
+
+import numpy as np
+import pandas as pd
+import pycompact
+
+SUMMARY_COLUMNS = ["days", "max", "sum", "n_rain", "n_dry", "max_date"]
+
+_NO_POSITION = np.iinfo(np.int64).max
+
+_COARSEN_AGGREGATES = {
+    "days": "sum",
+    "max": "max",
+    "sum": "sum",
+    "n_rain": "sum",
+    "n_dry": "sum",
+}
+
+
+def is_grouped_by_month(n_days: str) -> bool:
+    """
+    Check whether a period is summarized within each calendar month.
+
+    Args:
+        n_days (str): The period frequency (e.g. "16D", "MS", "YS").
+
+    Returns:
+        bool: True if the period bins never cross a month boundary.
+    """
+    return n_days.endswith("D") or n_days.endswith("MS") or n_days.endswith("M")
+
+
+def assign_period_labels(index: pd.DatetimeIndex, n_days: str):
+    """
+    Assign each daily timestamp to the label of its period bin.
+
+    Periods ending with "D", "MS" or "M" are binned within each calendar month,
+        starting from the first day of the month found in the data.
+        Other periods are resampled over the whole index.
+
+    Args:
+        index (pandas.DatetimeIndex): The sorted daily index.
+        n_days (str): The period frequency.
+
+    Returns:
+        tuple: A tuple containing the label of each timestamp (DatetimeIndex)
+            and the full bin index, including empty bins.
+    """
+
+    if not is_grouped_by_month(n_days):
+        grouped = pd.Series(np.arange(index.size), index=index).groupby(
+            pd.Grouper(freq=n_days)
+        )
+        bins = grouped.size().index
+        return bins[grouped.ngroup().to_numpy()], bins
+
+    month = index.to_period("M")
+
+    if not n_days.endswith("D"):
+        how = "start" if n_days.endswith("MS") else "end"
+        labels = month.to_timestamp(how=how).normalize().as_unit(index.unit)
+        return labels, labels.unique()
+
+    n_day = np.timedelta64(int(n_days[:-1] or 1), "D")
+    day = index.normalize().to_numpy()
+
+    # first day of each month found in the data
+    month_code = pd.factorize(month, sort=True)[0]
+    first_day = pd.Series(day).groupby(month_code).transform("min").to_numpy()
+    offset_bin = (day - first_day) // n_day
+    labels = pd.DatetimeIndex(first_day + offset_bin * n_day)
+
+    # include empty bins between the first and the last day of each month
+    month_first = pd.Series(first_day).groupby(month_code).first().to_numpy()
+    month_bins = pd.Series(offset_bin).groupby(month_code).max().to_numpy() + 1
+    bin_start = np.repeat(month_first, month_bins)
+    bin_offset = np.arange(month_bins.sum()) - np.repeat(
+        np.cumsum(month_bins) - month_bins, month_bins
+    )
+    bins = pd.DatetimeIndex(bin_start + bin_offset * n_day)
+
+    return labels.as_unit(index.unit), bins.as_unit(index.unit)
+
+
+def summarize(dataframe: pd.DataFrame, n_days: str = "1MS") -> pd.DataFrame:
+    """
+    Summarize daily rainfall data for all stations in one pass.
+
+    The result has the same layout as the hidrokit summary:
+        columns are a (station, statistic) MultiIndex with statistics
+        days, max, sum, n_rain, n_dry and max_date.
+
+    Args:
+        dataframe (pandas.DataFrame or pycompact.WetDayFrame): The daily rainfall
+            data, one column per station.
+        n_days (str, optional): The period frequency. Defaults to "1MS".
+
+    Returns:
+        pandas.DataFrame: The summary dataframe.
+    """
+    return summarize_all(dataframe, [n_days])[0]
+
+
+def summarize_all(dataframe: pd.DataFrame, n_days: list) -> list:
+    """
+    Summarize daily rainfall data for several periods from shared aggregates.
+
+    The daily-to-period bin labels of every period are assigned first.
+        Periods are then reduced from the finest to the coarsest, and
+        a period whose bins contain whole bins of a finer period
+        (e.g. yearly from monthly) is reduced from that period's
+        aggregates instead of the daily data.
+
+    Args:
+        dataframe (pandas.DataFrame or pycompact.WetDayFrame): The daily rainfall
+            data, one column per station.
+        n_days (list): The period frequencies (e.g. ["16D", "MS", "YS"]).
+
+    Returns:
+        list: A list of summary dataframes, in the same order as n_days.
+
+    Raises:
+        ValueError: If the data has no station columns.
+    """
+
+    if len(dataframe.columns) == 0:
+        raise ValueError("No station columns to summarize")
+
+    if isinstance(dataframe, pycompact.WetDayFrame):
+        return _summarize_wet_days(dataframe, n_days)
+
+    if not dataframe.index.is_monotonic_increasing:
+        dataframe = dataframe.sort_index()
+
+    index = dataframe.index
+    periods = {n_day: assign_period_labels(index, n_day) for n_day in n_days}
+    daily = _daily_aggregates(dataframe)
+
+    reduced = []
+    summaries = {}
+    for n_day in sorted(periods, key=lambda n_day: -periods[n_day][1].size):
+        labels, bins = periods[n_day]
+        source, source_labels = daily, labels.to_numpy()
+
+        # reduce from the coarsest finer period with nested bins
+        for fine_labels, fine_aggregates in reduced[::-1]:
+            fine_change = fine_labels[1:] != fine_labels[:-1]
+            if np.any((labels[1:] != labels[:-1]) & ~fine_change):
+                continue
+            fine_first = np.concatenate([[True], fine_change])
+            source, source_labels = fine_aggregates, labels[fine_first].to_numpy()
+            break
+
+        aggregates = _reduce_aggregates(source, source_labels)
+        reduced.append((labels, aggregates))
+        summaries[n_day] = _build_summary(
+            aggregates,
+            bins.rename("DATE" if is_grouped_by_month(n_day) else index.name),
+            index,
+        )
+
+    return [summaries[n_day] for n_day in n_days]
+
+
+def coarsen_summary(summary: pd.DataFrame, factor: int) -> pd.DataFrame:
+    """
+    Merge every `factor` consecutive periods of a summary into one period.
+
+    The days, sum, n_rain and n_dry statistics are added up and max is
+        the maximum of the merged periods. max_date is not coarsened and dropped.
+
+    Args:
+        summary (pandas.DataFrame): The summary with (station, statistic) columns.
+        factor (int): The number of consecutive periods to merge.
+
+    Returns:
+        pandas.DataFrame: The coarsened summary, labeled by the first merged period.
+    """
+    if factor <= 1:
+        return summary
+
+    groups = np.arange(summary.index.size) // factor
+    statistics = summary.columns.get_level_values(1)
+    stats = {}
+    for stat, func in _COARSEN_AGGREGATES.items():
+        if stat in statistics:
+            values = summary.xs(stat, axis=1, level=1).groupby(groups).agg(func)
+            stats[stat] = values.set_axis(summary.index[::factor])
+
+    stations = summary.columns.get_level_values(0).unique()
+    coarsened = pd.concat(stats, axis=1).swaplevel(axis=1)
+    return coarsened.reindex(
+        columns=pd.MultiIndex.from_product([stations, list(stats)])
+    )
+
+
+def summarize_bins(
+    dataframe: pd.DataFrame, labels: pd.DatetimeIndex, bins: pd.DatetimeIndex
+) -> pd.DataFrame:
+    """
+    Summarize the daily rows of some period bins only.
+
+    Used to recompute the bins touched by edited cells, the labels come from
+        assign_period_labels on the whole index.
+
+    Args:
+        dataframe (pandas.DataFrame): The sorted daily rows of the bins.
+        labels (pandas.DatetimeIndex): The bin label of each row.
+        bins (pandas.DatetimeIndex): The bins to summarize (the summary index).
+
+    Returns:
+        pandas.DataFrame: The summary rows of the bins.
+    """
+    aggregates = _reduce_aggregates(_daily_aggregates(dataframe), labels)
+    return _build_summary(aggregates, bins, dataframe.index)
+
+
+def _daily_aggregates(dataframe: pd.DataFrame) -> dict:
+    is_nan = dataframe.isna()
+    is_zero = dataframe.eq(0)
+    position = np.arange(len(dataframe))[:, np.newaxis]
+
+    return {
+        "days": pd.Series(1, index=dataframe.index),
+        "max": dataframe,
+        "sum": dataframe.fillna(0),
+        "n_rain": dataframe.gt(0),
+        "n_dry": is_nan | is_zero,
+        "has_value": ~(is_nan | is_zero),
+        "first_max": pd.DataFrame(
+            np.where(is_nan, _NO_POSITION, position),
+            index=dataframe.index,
+            columns=dataframe.columns,
+        ),
+    }
+
+
+def _summarize_wet_days(frame: pycompact.WetDayFrame, n_days: list) -> list:
+    # the aggregates are counted from the wet days and the bitmasks only,
+    # the dense dataframe is never built
+    if not frame.index.is_monotonic_increasing:
+        frame = pycompact.WetDayFrame.from_dataframe(
+            frame.to_dataframe().sort_index(), decimals=frame.decimals
+        )
+
+    index = frame.index
+    stations, rows, values = frame.wet_days()
+    missing_stations, missing_rows = np.nonzero(frame.missing_mask())
+
+    summaries = []
+    for n_day in n_days:
+        labels, bins = assign_period_labels(index, n_day)
+        codes = bins.get_indexer(labels)
+        aggregates = _wet_day_aggregates(
+            frame,
+            (stations, rows, values),
+            (missing_stations, missing_rows),
+            codes,
+            bins.size,
+        )
+        aggregates = {
+            key: (
+                pd.Series(value, index=bins)
+                if value.ndim == 1
+                else pd.DataFrame(value, index=bins, columns=frame.columns)
+            )
+            for key, value in aggregates.items()
+        }
+        summaries.append(
+            _build_summary(
+                aggregates,
+                bins.rename("DATE" if is_grouped_by_month(n_day) else index.name),
+                index,
+            )
+        )
+    return summaries
+
+
+def _wet_day_aggregates(frame, wet_days, missing_days, codes, n_bins) -> dict:
+    stations, rows, values = wet_days
+    n_stations = len(frame.columns)
+    size = n_bins * n_stations
+    cell = codes[rows] * n_stations + stations
+
+    days = np.bincount(codes, minlength=n_bins)
+    n_wet = np.bincount(cell, minlength=size)
+    n_missing = np.bincount(
+        codes[missing_days[1]] * n_stations + missing_days[0], minlength=size
+    )
+    n_valid = np.repeat(days, n_stations) - n_missing
+
+    wet_max = np.full(size, -np.inf)
+    np.maximum.at(wet_max, cell, values)
+    # zero days are not stored, they only matter when no wet day is larger
+    has_zero = n_valid > n_wet
+    maximum = np.where(has_zero, np.maximum(wet_max, 0), wet_max)
+    maximum[n_valid == 0] = np.nan
+
+    # position of the first maximum (same as idxmax) among the wet days
+    is_max = values == maximum[cell]
+    first_max = np.full(size, _NO_POSITION)
+    np.minimum.at(first_max, cell[is_max], rows[is_max])
+
+    def reshape(array):
+        return array.reshape(n_bins, n_stations)
+
+    return {
+        "days": days,
+        "max": reshape(maximum),
+        "sum": reshape(np.bincount(cell, weights=values, minlength=size)),
+        "n_rain": reshape(np.bincount(cell[values > 0], minlength=size)),
+        "n_dry": reshape(np.repeat(days, n_stations) - n_wet),
+        "has_value": reshape((n_wet > 0) & (first_max != _NO_POSITION)),
+        "first_max": reshape(first_max),
+    }
+
+
+def _reduce_aggregates(aggregates: dict, labels: np.ndarray) -> dict:
+    def grouped(key):
+        return aggregates[key].groupby(labels, sort=True)
+
+    # position of the first maximum (same as idxmax)
+    is_max = aggregates["max"].eq(grouped("max").transform("max"))
+    first_max = (
+        aggregates["first_max"]
+        .where(is_max, _NO_POSITION)
+        .groupby(labels, sort=True)
+        .min()
+    )
+
+    return {
+        "days": grouped("days").sum(),
+        "max": grouped("max").max(),
+        "sum": grouped("sum").sum(),
+        "n_rain": grouped("n_rain").sum(),
+        "n_dry": grouped("n_dry").sum(),
+        "has_value": grouped("has_value").any(),
+        "first_max": first_max,
+    }
+
+
+def _build_summary(
+    aggregates: dict, bins: pd.DatetimeIndex, index: pd.DatetimeIndex
+) -> pd.DataFrame:
+    columns = aggregates["max"].columns
+
+    def expand(key, fill_value=None):
+        return aggregates[key].reindex(bins, fill_value=fill_value)
+
+    days = expand("days", 0).to_numpy()
+    first_max = np.where(
+        expand("has_value", False).to_numpy(),
+        expand("first_max", _NO_POSITION).to_numpy(),
+        len(index),
+    )
+    max_timestamp = np.append(index.to_numpy(), np.datetime64("NaT"))
+    max_date = pd.DatetimeIndex(max_timestamp[first_max].ravel()).date
+
+    stats = {
+        "days": pd.DataFrame(
+            np.repeat(days[:, np.newaxis], columns.size, axis=1),
+            index=bins,
+            columns=columns,
+        ),
+        "max": expand("max"),
+        "sum": expand("sum", 0.0).round(3),
+        "n_rain": expand("n_rain", 0),
+        "n_dry": expand("n_dry", 0),
+        "max_date": pd.DataFrame(
+            max_date.reshape(first_max.shape), index=bins, columns=columns
+        ),
+    }
+
+    summary = pd.concat(stats, axis=1).swaplevel(axis=1)
+    return summary.reindex(
+        columns=pd.MultiIndex.from_product([columns, SUMMARY_COLUMNS])
+    )
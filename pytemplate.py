@@ -1,58 +1,27 @@
-"""TEMPLATE PLOTLY BASED ON THEME"""
+"""TEMPLATE PLOTLY BASED ON THEME
 
+The template is built once from the dash-bootstrap-templates theme and stored
+    as JSON in TEMPLATE.CACHE_FILE, later imports load the JSON instead of
+    building it again. Prebuild the file (e.g. on deploy) with:
+    python pytemplate.py
+"""
+
+import json
+import os
+from importlib import metadata
+from pathlib import Path
 import plotly.io as pio
-from dash_bootstrap_templates import load_figure_template
 from plotly import colors
+from plotly.graph_objects import layout
+from plotly.utils import PlotlyJSONEncoder
 from pyconfig import appConfig
 
-load_figure_template(appConfig.DASH_THEME.THEME.lower())
-hktemplate = pio.templates[pio.templates.default]
-
 # VARS
+_THEME = appConfig.DASH_THEME.THEME.lower()
 _TEMPLATE = appConfig.TEMPLATE
-_FONT_FAMILY = hktemplate.layout.font.family
-_RED, _GREEN, _BLUE = colors.hex_to_rgb(hktemplate.layout.font.color)
-FONT_COLOR_RGB_ALPHA = f"rgba({_RED},{_GREEN},{_BLUE},0.4)"
-
-## LAYOUT
-# WATERMARK
-_SOURCE_WATERMARK = _TEMPLATE.WATERMARK_SOURCE
-hktemplate.layout.images = [
-    {
-        "source": _SOURCE_WATERMARK,
-        "xref": "x domain",
-        "yref": "y domain",
-        "x": 0.5,
-        "y": 0.5,
-        "sizex": 0.5,
-        "sizey": 0.5,
-        "xanchor": "center",
-        "yanchor": "middle",
-        "name": "watermark-hidrokit",
-        "layer": "below",
-        "opacity": 0.1,
-    },
-]
-
-## GENERAL
-hktemplate.layout.hovermode = "x"
-hktemplate.layout.margin.t = 80
-hktemplate.layout.margin.b = 35
-hktemplate.layout.margin.l = 55
-hktemplate.layout.margin.r = 55
-hktemplate.layout.margin.pad = 0
-# hktemplate.layout.paper_bgcolor = "rgba(0,0,0,0)"
-hktemplate.layout.paper_bgcolor = hktemplate.layout.plot_bgcolor
-
-# LEGEND
-_LEGEND_FONT_SIZE = 15
-hktemplate.layout.showlegend = True
-hktemplate.layout.legend.font.size = _LEGEND_FONT_SIZE
-hktemplate.layout.legend.groupclick = "toggleitem"
-# hktemplate.layout.legend.title.text = "<b>placeholder</b>"
-
-
-def _apply_legend_inside():
+
+
+def _apply_legend_inside(hktemplate):
     hktemplate.layout.legend.xanchor = "left"
     hktemplate.layout.legend.yanchor = "top"
     hktemplate.layout.legend.x = 0.005
@@ -63,54 +32,8 @@ def _apply_legend_inside():
     hktemplate.layout.legend.bgcolor = "rgba(255,255,255,0.6)"
 
 
-if _TEMPLATE.SHOW_LEGEND_INSIDE:
-    _apply_legend_inside()
-
-# MODEBAR
-hktemplate.layout.modebar.activecolor = "blue"
-hktemplate.layout.modebar.add = (
-    "hoverclosest hovercompare v1hovermode togglehover drawrect eraseshape".split()
-)
-# hktemplate.layout.modebar.remove = "toImage"
-hktemplate.layout.modebar.bgcolor = "rgba(0,0,0,0)"
-hktemplate.layout.modebar.color = "rgba(0,0,0,0.6)"
-
-# NEWSHAPE
-hktemplate.layout.newshape.line.color = "red"
-hktemplate.layout.newshape.line.width = 3
-
-# HOVERLABEL
-hktemplate.layout.hoverlabel.font.family = _FONT_FAMILY
-
-# TITLE
-# hktemplate.layout.title.text = "<b>PLACEHOLDER TITLE</b>"
-hktemplate.layout.title.pad = dict(b=10, l=0, r=0, t=0)
-hktemplate.layout.title.x = 0
-hktemplate.layout.title.xref = "paper"
-hktemplate.layout.title.y = 1
-hktemplate.layout.title.yref = "paper"
-hktemplate.layout.title.yanchor = "bottom"
-hktemplate.layout.title.font.size = 35
-
-# XAXIS
-_XAXIS_GRIDCOLOR = "black"  # hktemplate.layout.xaxis.gridcolor
-_XAXIS_LINEWIDTH = 2
-_XAXIS_TITLE_FONT_SIZE = 20
-_XAXIS_TITLE_STANDOFF = 20
-hktemplate.layout.xaxis.mirror = True
-hktemplate.layout.xaxis.showline = True
-hktemplate.layout.xaxis.linewidth = _XAXIS_LINEWIDTH
-hktemplate.layout.xaxis.linecolor = _XAXIS_GRIDCOLOR
-hktemplate.layout.xaxis.spikecolor = _XAXIS_GRIDCOLOR
-hktemplate.layout.xaxis.gridcolor = FONT_COLOR_RGB_ALPHA
-hktemplate.layout.xaxis.gridwidth = _XAXIS_LINEWIDTH
-# hktemplate.layout.xaxis.title.text = "<b>PLACEHOLDER XAXIS</b>"
-hktemplate.layout.xaxis.title.font.size = _XAXIS_TITLE_FONT_SIZE
-hktemplate.layout.xaxis.title.standoff = _XAXIS_TITLE_STANDOFF
-
-
 # RANGESELECTOR XAXIS
-def _apply_rangeselector():
+def _apply_rangeselector(hktemplate):
     hktemplate.layout.xaxis.rangeselector.buttons = [
         {
             "count": 1,
@@ -151,40 +74,217 @@ def _apply_rangeselector():
     ]
 
 
-if _TEMPLATE.SHOW_RANGESELECTOR:
-    _apply_rangeselector()
+def _font_color_rgb_alpha(hktemplate):
+    red, green, blue = colors.hex_to_rgb(hktemplate.layout.font.color)
+    return f"rgba({red},{green},{blue},0.4)"
+
+
+def build_template():
+    """
+    Build the template from the dash-bootstrap-templates theme.
+
+    Returns:
+        plotly.graph_objects.layout.Template: The template.
+    """
+    # pylint: disable=import-outside-toplevel
+    from dash_bootstrap_templates import load_figure_template
+
+    load_figure_template(_THEME)
+    hktemplate = pio.templates[_THEME]
+
+    _font_family = hktemplate.layout.font.family
+    font_color_rgb_alpha = _font_color_rgb_alpha(hktemplate)
+
+    ## LAYOUT
+    # WATERMARK
+    _source_watermark = _TEMPLATE.WATERMARK_SOURCE
+    hktemplate.layout.images = [
+        {
+            "source": _source_watermark,
+            "xref": "x domain",
+            "yref": "y domain",
+            "x": 0.5,
+            "y": 0.5,
+            "sizex": 0.5,
+            "sizey": 0.5,
+            "xanchor": "center",
+            "yanchor": "middle",
+            "name": "watermark-hidrokit",
+            "layer": "below",
+            "opacity": 0.1,
+        },
+    ]
+
+    ## GENERAL
+    hktemplate.layout.hovermode = "x"
+    hktemplate.layout.margin.t = 80
+    hktemplate.layout.margin.b = 35
+    hktemplate.layout.margin.l = 55
+    hktemplate.layout.margin.r = 55
+    hktemplate.layout.margin.pad = 0
+    # hktemplate.layout.paper_bgcolor = "rgba(0,0,0,0)"
+    hktemplate.layout.paper_bgcolor = hktemplate.layout.plot_bgcolor
+
+    # LEGEND
+    _legend_font_size = 15
+    hktemplate.layout.showlegend = True
+    hktemplate.layout.legend.font.size = _legend_font_size
+    hktemplate.layout.legend.groupclick = "toggleitem"
+    # hktemplate.layout.legend.title.text = "<b>placeholder</b>"
+
+    if _TEMPLATE.SHOW_LEGEND_INSIDE:
+        _apply_legend_inside(hktemplate)
+
+    # MODEBAR
+    hktemplate.layout.modebar.activecolor = "blue"
+    hktemplate.layout.modebar.add = (
+        "hoverclosest hovercompare v1hovermode togglehover drawrect eraseshape".split()
+    )
+    # hktemplate.layout.modebar.remove = "toImage"
+    hktemplate.layout.modebar.bgcolor = "rgba(0,0,0,0)"
+    hktemplate.layout.modebar.color = "rgba(0,0,0,0.6)"
+
+    # NEWSHAPE
+    hktemplate.layout.newshape.line.color = "red"
+    hktemplate.layout.newshape.line.width = 3
+
+    # HOVERLABEL
+    hktemplate.layout.hoverlabel.font.family = _font_family
+
+    # TITLE
+    # hktemplate.layout.title.text = "<b>PLACEHOLDER TITLE</b>"
+    hktemplate.layout.title.pad = dict(b=10, l=0, r=0, t=0)
+    hktemplate.layout.title.x = 0
+    hktemplate.layout.title.xref = "paper"
+    hktemplate.layout.title.y = 1
+    hktemplate.layout.title.yref = "paper"
+    hktemplate.layout.title.yanchor = "bottom"
+    hktemplate.layout.title.font.size = 35
+
+    # XAXIS
+    _xaxis_gridcolor = "black"  # hktemplate.layout.xaxis.gridcolor
+    _xaxis_linewidth = 2
+    _xaxis_title_font_size = 20
+    _xaxis_title_standoff = 20
+    hktemplate.layout.xaxis.mirror = True
+    hktemplate.layout.xaxis.showline = True
+    hktemplate.layout.xaxis.linewidth = _xaxis_linewidth
+    hktemplate.layout.xaxis.linecolor = _xaxis_gridcolor
+    hktemplate.layout.xaxis.spikecolor = _xaxis_gridcolor
+    hktemplate.layout.xaxis.gridcolor = font_color_rgb_alpha
+    hktemplate.layout.xaxis.gridwidth = _xaxis_linewidth
+    # hktemplate.layout.xaxis.title.text = "<b>PLACEHOLDER XAXIS</b>"
+    hktemplate.layout.xaxis.title.font.size = _xaxis_title_font_size
+    hktemplate.layout.xaxis.title.standoff = _xaxis_title_standoff
+
+    if _TEMPLATE.SHOW_RANGESELECTOR:
+        _apply_rangeselector(hktemplate)
+
+    # YAXIS
+    _yaxis_gridcolor = "black"  # hktemplate.layout.yaxis.gridcolor
+    _yaxis_linewidth = 2
+    _yaxis_title_font_size = 20
+    _yaxis_title_standoff = 15
+    hktemplate.layout.yaxis.mirror = True
+    hktemplate.layout.yaxis.showline = True
+    hktemplate.layout.yaxis.linewidth = _yaxis_linewidth
+    hktemplate.layout.yaxis.linecolor = _yaxis_gridcolor
+    hktemplate.layout.yaxis.spikecolor = _yaxis_gridcolor
+    hktemplate.layout.yaxis.rangemode = "tozero"
+    hktemplate.layout.yaxis.gridcolor = font_color_rgb_alpha
+    hktemplate.layout.yaxis.gridwidth = _yaxis_linewidth
+    # hktemplate.layout.yaxis.title.text = "<b>PLACEHOLDER XAXIS</b>"
+    hktemplate.layout.yaxis.title.font.size = _yaxis_title_font_size
+    hktemplate.layout.yaxis.title.standoff = _yaxis_title_standoff
+
+    # SUBPLOTS
+    # ANNOTATION
+    hktemplate.layout.annotationdefaults.font.color = hktemplate.layout.font.color
+
+    ## PLOT SPECIFIC
+
+    # HEATMAP
+
+    hktemplate.data.heatmap[0].colorbar.title.text = "placeholder"
+
+    # BAR
+    # hktemplate.data.bar[0].offset = 0
+    # hktemplate.data.bar[0].marker.color = "red"
+
+    # LAYOUT BAR
+    hktemplate.layout.barmode = "stack"
+    hktemplate.layout.bargap = 0
+
+    return hktemplate
+
+
+def _cache_key():
+    # the stored template is stale when the theme, the options or the packages change
+    options = {key: value for key, value in _TEMPLATE.items() if key != "CACHE_FILE"}
+    return {
+        "theme": _THEME,
+        "options": options,
+        "plotly": metadata.version("plotly"),
+        "dash-bootstrap-templates": metadata.version("dash-bootstrap-templates"),
+    }
+
+
+def load_template(cache_file: str = None, rebuild: bool = False):
+    """
+    Load the template from the JSON cache file, building and storing it if needed.
+
+    Args:
+        cache_file (str, optional): The JSON file.
+            Defaults to TEMPLATE.CACHE_FILE from app_config.yml,
+            if empty the template is always built.
+        rebuild (bool, optional): Whether to build the template
+            even if the cache file is fresh. Defaults to False.
+
+    Returns:
+        plotly.graph_objects.layout.Template: The template.
+    """
+    cache_file = _TEMPLATE.get("CACHE_FILE") if cache_file is None else cache_file
+    if not cache_file:
+        return build_template()
+
+    cache_path = Path(cache_file)
+    key = _cache_key()
+
+    if not rebuild and cache_path.is_file():
+        try:
+            cached = json.loads(cache_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            cached = {}
+        if cached.get("key") == key:
+            # stored from a validated template, so validation is skipped
+            return layout.Template(cached["template"], _validate=False)
+
+    hktemplate = build_template()
+
+    # write to a temporary file first, so other workers never read a partial file
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    temporary_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+    temporary_path.write_text(
+        json.dumps(
+            {"key": key, "template": hktemplate.to_plotly_json()},
+            cls=PlotlyJSONEncoder,
+        ),
+        encoding="utf-8",
+    )
+    os.replace(temporary_path, cache_path)
 
-# YAXIS
-_YAXIS_GRIDCOLOR = "black"  # hktemplate.layout.yaxis.gridcolor
-_YAXIS_LINEWIDTH = 2
-_YAXIS_TITLE_FONT_SIZE = 20
-_YAXIS_TITLE_STANDOFF = 15
-hktemplate.layout.yaxis.mirror = True
-hktemplate.layout.yaxis.showline = True
-hktemplate.layout.yaxis.linewidth = _YAXIS_LINEWIDTH
-hktemplate.layout.yaxis.linecolor = _YAXIS_GRIDCOLOR
-hktemplate.layout.yaxis.spikecolor = _YAXIS_GRIDCOLOR
-hktemplate.layout.yaxis.rangemode = "tozero"
-hktemplate.layout.yaxis.gridcolor = FONT_COLOR_RGB_ALPHA
-hktemplate.layout.yaxis.gridwidth = _YAXIS_LINEWIDTH
-# hktemplate.layout.yaxis.title.text = "<b>PLACEHOLDER XAXIS</b>"
-hktemplate.layout.yaxis.title.font.size = _YAXIS_TITLE_FONT_SIZE
-hktemplate.layout.yaxis.title.standoff = _YAXIS_TITLE_STANDOFF
+    return hktemplate
 
-# SUBPLOTS
-# ANNOTATION
-hktemplate.layout.annotationdefaults.font.color = hktemplate.layout.font.color
 
-## PLOT SPECIFIC
+hktemplate = load_template()
 
-# HEATMAP
+# registered as the default template, as load_figure_template does
+pio.templates[_THEME] = hktemplate
+pio.templates.default = _THEME
 
-hktemplate.data.heatmap[0].colorbar.title.text = "placeholder"
+FONT_COLOR_RGB_ALPHA = _font_color_rgb_alpha(hktemplate)
 
-# BAR
-# hktemplate.data.bar[0].offset = 0
-# hktemplate.data.bar[0].marker.color = "red"
 
-# LAYOUT BAR
-hktemplate.layout.barmode = "stack"
-hktemplate.layout.bargap = 0
+if __name__ == "__main__":
+    load_template(rebuild=True)
+    print(f"template {_THEME} stored in {_TEMPLATE.CACHE_FILE}")
@@ -0,0 +1,21 @@
+"""Tests of the headless batch pipeline (pybatch.run_batch)."""
+
+import shutil
+import pybatch
+
+
+def test_run_batch_skips_bad_files(tmp_path):
+    inputs = tmp_path / "inputs"
+    inputs.mkdir()
+    shutil.copy("example_2Y4S.csv", inputs / "good.csv")
+    (inputs / "date_only.csv").write_text("DATE\n2020-01-01\n2020-01-02\n")
+    (inputs / "bad_dates.csv").write_text("DATE,STA\nfoo,1\nbar,2\n")
+
+    stats = pybatch.run_batch([str(inputs)], tmp_path / "results", max_workers=2)
+
+    assert stats["files"] == 1
+    assert sorted(stats["failed"]) == [
+        str(inputs / "bad_dates.csv"),
+        str(inputs / "date_only.csv"),
+    ]
+    assert (tmp_path / "results" / "good_results.csv").exists()
@@ -0,0 +1,45 @@
+"""Tests of the maximum rainfall events figure (pyfigure.generate_summary_maximum_date)."""
+
+import numpy as np
+import pandas as pd
+import pyfigure
+import pyfunc
+
+
+def _summary_all():
+    dataframe = pd.read_csv("example_2Y4S.csv", index_col=0, parse_dates=True)
+    dataframe.iloc[100:200, 1] = np.nan
+    return pyfunc.generate_summary_all(dataframe, n_days=["16D", "MS", "YS"])
+
+
+def test_maximum_date_merges_periods_into_largest_event():
+    monthly = _summary_all()[1]
+    stations = monthly.columns.get_level_values(0).unique()
+
+    bounds, dates, maxima = pyfigure._melt_maximum_dates(
+        monthly, stations, ["max_date"], factor=3
+    )
+
+    for position, station in enumerate(stations):
+        events = monthly[station].dropna(subset=["max_date"])
+        groups = monthly.index.get_indexer(events.index) // 3
+        largest = events.loc[events.groupby(groups)["max"].idxmax()]
+        start, end = bounds[position], bounds[position + 1]
+        np.testing.assert_array_equal(maxima[start:end], largest["max"].to_numpy())
+        np.testing.assert_array_equal(
+            dates[start:end], pd.to_datetime(largest["max_date"]).to_numpy()
+        )
+
+
+def test_maximum_date_titles_merged_periods():
+    summary_all = _summary_all()
+
+    figure = pyfigure.generate_summary_maximum_date(summary_all, max_points=100).figure
+
+    titles = [annotation.text for annotation in figure.layout.annotations]
+    assert titles == [
+        "Biweekly (every 2 periods merged)",
+        "Monthly",
+        "Yearly",
+    ]
+    assert len(figure.data) == 3 * 4
@@ -0,0 +1,61 @@
+"""Tests of the incremental analysis update (pyfunc.update_analysis)."""
+
+import pandas as pd
+import pytest
+import pyfunc
+
+N_DAYS = ["16D", "MS", "YS"]
+
+
+def _analyze_edited(stored, previous_edits, table_edits):
+    table_columns = [{"id": "DATE", "name": "DATE"}] + [
+        {"id": name, "name": name} for name in stored.columns
+    ]
+    previous = pyfunc.transform_stored_dataframe(
+        stored, table_columns, table_edits=previous_edits
+    )
+    summary_all = pyfunc.generate_summary_all(previous, n_days=N_DAYS)
+    cumsum = pyfunc.calculate_cumulative_sum(previous)
+
+    dataframe = pyfunc.transform_stored_dataframe(
+        stored, table_columns, table_edits=table_edits
+    )
+    cells = pyfunc.locate_edited_cells(
+        stored.index,
+        table_columns,
+        pyfunc.diff_table_edits(previous_edits, table_edits),
+    )
+    updated = pyfunc.update_analysis(dataframe, summary_all, cumsum, cells, N_DAYS)
+    return dataframe, updated
+
+
+@pytest.mark.parametrize(
+    "previous_edits, table_edits",
+    [
+        (None, {"10": {"STA_I": "250.7"}}),
+        (None, {"10": {"STA_I": "250.7"}, "400": {"STA_I": ""}}),
+        ({"3": {"STA_A": "1.5"}}, {"3": {"STA_A": "1.5"}, "30": {"STA_I": "25"}}),
+        (None, {"10": {"STA_A": "3.5"}, "200": {"STA_M": ""}}),
+        ({"30": {"STA_I": "25"}}, {"10": {"STA_A": "3.5"}}),
+    ],
+)
+def test_update_analysis_integer_station(previous_edits, table_edits):
+    stored = pd.read_csv("example_2Y4S.csv", index_col=0, parse_dates=True)
+    assert stored["STA_I"].dtype == "int64"
+
+    dataframe, (summary_all, cumsum, _) = _analyze_edited(
+        stored, previous_edits, table_edits
+    )
+
+    expected_all = pyfunc.generate_summary_all(dataframe, n_days=N_DAYS)
+    for summary, expected in zip(summary_all, expected_all):
+        pd.testing.assert_frame_equal(summary, expected)
+    pd.testing.assert_frame_equal(cumsum, pyfunc.calculate_cumulative_sum(dataframe))
+
+
+def test_update_analysis_without_station_edits():
+    stored = pd.read_csv("example_2Y4S.csv", index_col=0, parse_dates=True)
+
+    _, (_, _, updated_rows) = _analyze_edited(stored, None, {"10": {"DELETED": "1"}})
+
+    assert all(rows.size == 0 for rows in updated_rows)
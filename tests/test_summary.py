@@ -0,0 +1,20 @@
+"""Tests of the shared-aggregate summary (pysummary.summarize_all)."""
+
+import pandas as pd
+import pytest
+import pycompact
+import pyfunc
+import pysummary
+
+N_DAYS = ["16D", "MS", "YS"]
+
+
+def test_summarize_all_without_stations():
+    stored = pd.read_csv("example_2Y4S.csv", index_col=0, parse_dates=True)
+    dataframe = stored[[]]
+
+    for data in (dataframe, pycompact.compact_dataframe(dataframe)):
+        with pytest.raises(ValueError, match="No station columns"):
+            pysummary.summarize_all(data, N_DAYS)
+    with pytest.raises(ValueError):
+        pyfunc.generate_summary_all(dataframe, n_days=N_DAYS)
@@ -0,0 +1,59 @@
+"""Tests of the table edits applied to a stored dataframe (pyfunc.apply_table_edits)."""
+
+import numpy as np
+import pandas as pd
+import pyfunc
+
+
+def test_apply_table_edits_reports_coerced_cells():
+    stored = pd.read_csv("example_2Y4S.csv", index_col=0, parse_dates=True)
+    table_edits = {
+        "10": {"STA_I": "250.7", "STA_A": "abc"},
+        "400": {"STA_I": ""},
+        "5": {"STA_A": 3, "MISSING": "1"},
+    }
+
+    dataframe, coerced = pyfunc.apply_table_edits(
+        stored, table_edits, return_coerced=True
+    )
+
+    assert coerced == [(10, "STA_A")]
+    assert dataframe["STA_I"].dtype == "float64"
+    assert dataframe["STA_I"].iloc[10] == 250.7
+    assert np.isnan(dataframe["STA_I"].iloc[400])
+    assert np.isnan(dataframe["STA_A"].iloc[10])
+    assert dataframe["STA_A"].iloc[5] == 3
+    pd.testing.assert_frame_equal(
+        dataframe.drop(index=dataframe.index[[5, 10, 400]]),
+        stored.astype(float).drop(index=stored.index[[5, 10, 400]]),
+    )
+
+
+def test_transform_stored_dataframe_text_column():
+    stored = pd.read_csv("example_2Y4S.csv", index_col=0, parse_dates=True)
+    stored["NOTE"] = "x"
+    table_columns = [{"id": "DATE", "name": "DATE"}] + [
+        {"id": name, "name": name} for name in stored.columns
+    ]
+
+    dataframe = pyfunc.transform_stored_dataframe(
+        stored, table_columns, table_edits={"3": {"NOTE": "12"}}
+    )
+
+    assert dataframe["NOTE"].dtype == "float64"
+    assert dataframe["NOTE"].iloc[3] == 12
+    assert dataframe["NOTE"].drop(index=dataframe.index[3]).isna().all()
+
+
+def test_transform_stored_dataframe_sorts_dates():
+    stored = pd.read_csv("example_2Y4S.csv", index_col=0, parse_dates=True)
+    table_columns = [{"id": "DATE", "name": "DATE"}] + [
+        {"id": name, "name": name} for name in stored.columns
+    ]
+
+    dataframe = pyfunc.transform_stored_dataframe(stored.iloc[::-1], table_columns)
+
+    assert dataframe.index.is_monotonic_increasing
+    pd.testing.assert_frame_equal(
+        dataframe, pyfunc.transform_stored_dataframe(stored, table_columns)
+    )